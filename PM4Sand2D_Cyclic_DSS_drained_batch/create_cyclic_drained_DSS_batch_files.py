@@ -5,7 +5,7 @@ Created on Thursday Feb1 08:03:57 2024
 @author: kziot
 
 
-- File opens Template with header line info, writes parametrically varying 
+- File opens Template with header line info, writes parametrically varying
   parameters underneath, writes complete contents of DSS_cyclic_drained.f2fis file
   sets savefile information (for *.sav in running FLAC2D) and closes it
 - Each produced *.f2fis file is named according to the varied parameters
@@ -15,125 +15,104 @@ Created on Thursday Feb1 08:03:57 2024
   number of cycles to be performed at each strain limit (degradation), and maximum strain
   to be reached by each driver
 - if 'volumetric' set to 1 then files are produced that apply uniform strain controlled @1% loading for a maximum
-  number of cycles / if not the file produces files for MRD curves that exercise the element for Ncyc across an 
+  number of cycles / if not the file produces files for MRD curves that exercise the element for Ncyc across an
   array of shear strains
+- arrays of varied values and the naming rules live in sweep_dDSS_MRD.json and sweep_dDSS_vol.json;
+  the drivers are produced by the shared sweep engine in batch_tools/sweep.py
 - all other variables are defined inside DSS_cyclic_drained.f2fis and can be either
-  changed within (if constant across all drivers) or brought herein to be added as 
+  changed within (if constant across all drivers) or brought into the spec files to be added as
   other array to be iterated over following the same philosophy
 - only batch_drainedDSS_***.f2fis file needs to be called by FLAC2D
+- the settings below switch optional modes on (incremental, shards, resume, ...); see their
+  comments and the README
 - CAUTION: file naming conventions intimately related to post-processing & plotting protocols
 """
-import os 
+import os
+import sys
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, "..", "batch_tools"))
+from sweep      import (iter_cases, load_spec, run_sweep, validate_thin)
+from cost_model import (learn_cost_model, with_history_budget)
+from resume     import incomplete_cases
+from sampling   import (load_study, plan_study)
+from convergence import (load_ladder, plan_ladder)
 
 # Input Parameters
-Soil     = ""
-TestName = "dDSS" # will match template Driver and built upon that
-
-# Create arrays of values to be varied across all Drivers
+# Relative densities, number of cycles at each strain and maximum strain index
+# (gamma_count, stop at this value in limit array(10)) are set in the spec files.
 # Produced files will be named accordingly
 volumetric  = 0
-Dr          = [0.35, 0.55, 0.75]    # Relative Density
-Ncyc        = [2]                   # Number of Cycles to be performed at each strain
-gamma_count = [8]                   # Stop at this value in limit array(10) [index in array]
-
-# Dictionary that matches strain array index to actual maximum strain reached in driver
-gamma_dict = {1:"0.0003%",2:"0.001%",3:"0.003%",4:"0.01%",5:"0.03%",6:"0.1%",7:"0.3%",8:"1%",9:"3%",10:"10%"}
-
-Test_File     = os.path.join(script_dir, "DSS_cyclic_drained.f2fis")
-Template_File = os.path.join(script_dir, "templ_drDSScyc.f2fis")
-
-# Initialize lines for final batch file
-call_line   = 'program call \'#\'\n'
-batch_lines = []
-
-if volumetric  != 1:
-  for Dr_i in Dr:
-      for Ncyc_i in Ncyc:
-          for gamma_count_i in gamma_count:
-                # First create a file name 
-                BaseFile = TestName+Soil+ "_MRD" + "_Dr" +str(int(Dr_i*100))+"_Ncyc"+str(Ncyc_i)+"_max"+str(gamma_dict[gamma_count_i])
-                FileName = os.path.join(script_dir, BaseFile + ".f2fis")
-                FileName_in_BatchFile = os.path.join(BaseFile + ".f2fis")
-
-                # Create a new file and open template and test file
-                fileID 			= open(FileName,"w+");
-                Template_fileId = open(Template_File,"r");
-                Test_fileId     = open(Test_File,"r")
-
-                # Writing to a file
-                fileID.write(Template_fileId.read())
-                fileID.write("\n\n")
-
-                fileID.write(";------------GENERAL INPUT CONDITIONS------------\n")
-                fileID.write("fish def _var_inputs\n")
-                fileID.write("\t_Dr           = " + str(Dr_i) + " \n")
-                fileID.write("\t_nCycles      = " + str(Ncyc_i) + " \n")
-                fileID.write("\t_strainCount  = " + str(gamma_count_i) + " \n")
-                fileID.write("\t_basefile     = \'" + BaseFile + "\' \n")
-                fileID.write("end \n");
-                fileID.write("[_var_inputs]\n\n")
-
-                fileID.write(Test_fileId.read())
-
-                fileID.write(";-------------Footer-------------------\n")
-                fileID.write(";save @_savefile\n")
-                fileID.write(";--------------------------------------\n")
-
-                # Closing the files
-                Test_fileId.close()
-                Template_fileId.close()
-                fileID.close()
-                batch_lines.append(call_line.replace("#", FileName_in_BatchFile))
-
-  batch_file_path = os.path.join(script_dir, "batch_drainedDSS_MRD.f2fis")
-  batch_file = open(batch_file_path, "w")
 
+# 1: keep a content-hash manifest and only rewrite drivers whose content changed
+#    (a *_delta.f2fis batch file then calls only the added/changed drivers)
+# 0: write every driver (default)
+incremental = 0
+
+# >1: also split the calls into this many balanced batch files (batch_*_shardXXofNN.f2fis)
+#     each one running in its own working folder; gather the csv and .sav files afterwards
+#     with sharding.collect_shard_results
+shards      = 1
+
+# 1: learn a runtime cost model from previous results (results/ folder) and order the
+#    drivers longest job first; shards are then balanced by predicted runtime
+ordering    = 0
+
+# 1: resume an interrupted batch. Outputs of every driver are checked in results/ (five element
+#    csv files + _MRD.csv, headers and rows) and a *_resume.f2fis batch file calls only the
+#    drivers with missing or broken results
+resume      = 0
+
+# 1: sampling study instead of the full sweep. The secondary parameters of the study file are
+#    sampled over their ranges and crossed with the (few) axes values of the study file
+#    (batch file and design csv named in the study file)
+sampling    = 0
+Study_File  = os.path.join(script_dir, "study_dDSS_secondary.json")
+
+# 1: thin drivers of a few hundred bytes that 'program call' the shared template and body
+#    files instead of copying them (a fix to the body then needs no regeneration)
+thin        = 0
+
+# >0: rows per element csv file. The history interval of each driver is set from its steps
+#     predicted by the cost model (0 keeps the interval of the body)
+history_budget = 0
+
+# 1: time-step convergence study instead of the full sweep. The cases of the ladder file are run at
+#    every increment of its ladder (batch file named in the ladder file)
+convergence = 0
+Ladder_File = os.path.join(script_dir, "ladder_dDSS_maxStrInc.json")
+
+if volumetric != 1:
+    Spec_File = os.path.join(script_dir, "sweep_dDSS_MRD.json")
 else:
-  for Dr_i in Dr:
-      for Ncyc_i in Ncyc:
-                # First create a file name 
-                BaseFile = TestName+ Soil +"_vol"+ "_Dr"+str(int(Dr_i*100))+"_Ncyc"+str(Ncyc_i)+"_max"+str(gamma_dict[8])
-                FileName = os.path.join(script_dir, BaseFile + ".f2fis")
-                FileName_in_BatchFile = os.path.join(BaseFile + ".f2fis")
-
-                # Create a new file and open template and test file
-                fileID          = open(FileName,"w+");
-                Template_fileId = open(Template_File,"r");
-                Test_fileId     = open(Test_File,"r")
-
-                # Writing to a file
-                fileID.write(Template_fileId.read())
-                fileID.write("\n\n")
-
-                fileID.write(";------------GENERAL INPUT CONDITIONS------------\n")
-                fileID.write("fish def _var_inputs\n")
-                fileID.write("\t_Dr           = " + str(Dr_i) + " \n")
-                fileID.write("\t_nCycles      = " + str(Ncyc_i) + " \n")
-                fileID.write("\t_strainCount = 1                   \n")
-                fileID.write("\t_basefile     = \'" + BaseFile + "\' \n")
-                fileID.write("end \n");
-                fileID.write("[_var_inputs]\n\n")
-
-                fileID.write(Test_fileId.read())
-
-                fileID.write(";-------------Footer-------------------\n")
-                fileID.write(";save @_savefile\n")
-                fileID.write(";--------------------------------------\n")
-
-                # Closing the files
-                Test_fileId.close()
-                Template_fileId.close()
-                fileID.close()
-                batch_lines.append(call_line.replace("#", FileName_in_BatchFile))
-
-  batch_file_path = os.path.join(script_dir, "batch_drainedDSS_vol.f2fis")
-  batch_file = open(batch_file_path, "w")
-
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write(";                     FLAC batch calling of input files                 \n")
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write("\n")
-batch_file.writelines(batch_lines)
-batch_file.close()
+    Spec_File = os.path.join(script_dir, "sweep_dDSS_vol.json")
+
+spec = load_spec(Spec_File)
+cost_model = learn_cost_model(spec) if ordering == 1 else None
+
+cases      = None
+batch_file = spec["batch_file"]
+if sampling == 1:
+    study       = load_study(Study_File)
+    spec, cases = plan_study(spec, study)
+    batch_file  = study["batch_file"]
+elif convergence == 1:
+    ladder      = load_ladder(Ladder_File)
+    spec, cases = plan_ladder(spec, ladder)
+    batch_file  = ladder["batch_file"]
+if resume == 1:
+    cases      = incomplete_cases(spec, cases if cases is not None else iter_cases(spec),
+                                  os.path.join(script_dir, "results"))
+    batch_file = batch_file.replace(".f2fis", "_resume.f2fis")
+
+if history_budget > 0:
+    spec, cases = with_history_budget(spec, cases if cases is not None else iter_cases(spec),
+                                      history_budget, cost_model or learn_cost_model(spec))
+
+if thin == 1 and cases is not None:
+    cases = list(cases)
+run_sweep(spec, cases, batch_file = batch_file,
+          incremental = (incremental == 1), shards = shards, cost_model = cost_model,
+          thin = (thin == 1))
+if thin == 1:
+    validate_thin(spec, cases)
 ''' EoF'''
@@ -4,7 +4,7 @@
 Created on Thursday Feb1 08:03:57 2024
 @author: kziot
 
-- File opens Template with header line info, writes parametrically varying 
+- File opens Template with header line info, writes parametrically varying
   parameters underneath, writes complete contents of DSS_cyclic_undrained.f2fis file
   sets savefile information (for *.sav in running FLAC) and closes it
 - Each produced *.f2fis file is named according to the varied parameters
@@ -12,93 +12,138 @@ Created on Thursday Feb1 08:03:57 2024
   generated for later being called in FLAC2D
 - As of now, placeholders for relative density, overburden stress, static shear
   stress bias, and Ko (can be provided with 1 or more array values)
+- arrays of varied values, derived values (FirstCallFlag) and the naming rule live in
+  sweep_uDSS_cyc.json; the drivers are produced by the shared sweep engine in
+  batch_tools/sweep.py (template and driver body are read once for the whole sweep)
 - all other variables are defined inside DSS_cyclic_undrained.f2fis and can be either
-  changed within (if constant across all drivers) or brought herein to be added as 
-  another array to be iterated over... following the same philosophy
+  changed within (if constant across all drivers) or brought into the spec file to be
+  added as another array to be iterated over... following the same philosophy
 - only the batch_undrainedDSS_cyc***.f2fis file needs to be called by FLAC2D
+- the settings below switch optional modes on (incremental, shards, adaptive, extend, ...);
+  see their comments and the README
 - CAUTION: file naming conventions intimately related to post-processing & plotting protocols
 """
 import os
+import sys
 # Get absolute path to the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, "..", "batch_tools"))
+from sweep        import (iter_cases, load_spec, run_sweep, validate_thin)
+from cost_model   import (learn_cost_model, with_history_budget)
+from adaptive_csr import plan_followups
+from extend       import (plan_extensions, with_checkpoints)
+from resume       import incomplete_cases
+from sampling     import (load_study, plan_study)
+from convergence  import (load_ladder, plan_ladder)
 #------------------------------------------------------------------------------
 # Input Parameters - Example
 #------------------------------------------------------------------------------
-Soil     = ""        # empty now -- populate if more specific
-TestName = "uDSS"    # will match template and Driver and built upon that
-
-# Create arrays of values to be varied across all Drivers
+# Relative densities, overburdens, static shear stress bias ratios and Ko values
+# to be varied across all Drivers are set in the spec file.
 # Produced files will be named accordingly
-
-Dr       = [0.35, 0.55, 0.75]         # Relative Density
-sig_vc   = [1,4,8]                    # initial overburden stress
-alpha    = [0.0,0.1,0.2,0.3]          # static shear stress bias ratio
-#alpha   = [0.0]                      # static shear stress bias ratio
-Ko       = [0.3,0.5,0.8,1.2]          # coefficient of lateral earth pressures at rest
-#Ko      = [0.5]                      # coefficient of lateral earth pressures at rest
-
-Test_File     = os.path.join(script_dir, "DSS_cyclic_undrained.f2fis")
-Template_File = os.path.join(script_dir, "templ_uDSScyc.f2fis")
-
-# Initialize lines for final batch file
-call_line   = 'program call \'#\'\n'
-batch_lines = []
-
-for Dr_i in Dr:
-    for sig_vc_i in sig_vc:
-        for alpha_i in alpha:
-            for Ko_i in Ko:
-                # First create a file name 
-                
-                if alpha_i == 0.0:
-                    FirstCallFlag = 0
-                else:
-                    FirstCallFlag = 1
-
-                BaseFile = TestName + Soil+"_cyc"+"_Dr"+str(int(Dr_i*100))+"_sig"+str(sig_vc_i)+"_a"+str(alpha_i)+"_Ko"+str(Ko_i)
-                FileName = os.path.join(script_dir, BaseFile + ".f2fis")
-                FileName_in_BatchFile = os.path.join(BaseFile + ".f2fis")
-
-
-                # Create a new file and open template and test file
-                fileID 			= open(FileName,"w+");
-                Template_fileId = open(Template_File,"r");
-                Test_fileId     = open(Test_File,"r")
-
-                # Writing to a file
-                fileID.write(Template_fileId.read())
-                fileID.write("\n\n")
-
-                fileID.write(";------------GENERAL INPUT CONDITIONS------------\n")
-                fileID.write("fish def _var_inputs\n")
-                fileID.write("\t_Dr          = " + str(Dr_i) + " \n")
-                fileID.write("\t_static_bias = " + str(alpha_i) + " \n")
-                fileID.write("\t_flag_on_FirstCall = " + str(FirstCallFlag) + " \n")
-                fileID.write("\t_confinement = " + str(sig_vc_i) + " \n")
-                fileID.write("\t_Ko          = " + str(Ko_i) + " \n")
-                fileID.write("\t_basefile    = \'" + BaseFile + "\' \n")
-                fileID.write("end \n");
-                fileID.write("[_var_inputs]\n\n")
-
-                fileID.write(Test_fileId.read())
-
-                fileID.write(";-------------Footer-------------------\n")
-                fileID.write(";save @_savefile\n")
-                fileID.write(";--------------------------------------\n")
-
-                # Closing the files
-                Test_fileId.close()
-                Template_fileId.close()
-                fileID.close()
-                batch_lines.append(call_line.replace("#", FileName_in_BatchFile))
-
-batch_file_path = os.path.join(script_dir, "batch_undrainedDSS_cyc.f2fis")
-batch_file = open(batch_file_path, "w")
-
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write(";                     FLAC batch calling of input files                 \n")
-batch_file.write(";-----------------------------------------------------------------------\n")
-batch_file.write("\n")
-batch_file.writelines(batch_lines)
-batch_file.close()
+Spec_File = os.path.join(script_dir, "sweep_uDSS_cyc.json")
+
+# 1: keep a content-hash manifest and only rewrite drivers whose content changed
+#    (a *_delta.f2fis batch file then calls only the added/changed drivers)
+# 0: write every driver (default)
+incremental = 0
+
+# >1: also split the calls into this many balanced batch files (batch_*_shardXXofNN.f2fis)
+#     each one running in its own working folder; gather the csv and .sav files afterwards
+#     with sharding.collect_shard_results
+shards      = 1
+
+# 1: learn a runtime cost model from previous results (results/ folder) and order the
+#    drivers longest job first; shards are then balanced by predicted runtime
+ordering    = 0
+
+# 1: adaptive follow-up round instead of the full sweep. Existing *_csrN.csv results are read,
+#    cases whose CSR-N points do not constrain CRR15 for the criterion below get one follow-up
+#    driver with five new CSRs (batch_undrainedDSS_cyc_adaptive.f2fis)
+adaptive    = 0
+adaptive_criterion = "Ncyc_to_3%_strain"
+
+# 1: resume an interrupted batch. Outputs of every driver are checked in results/ (five element
+#    csv files + _csrN.csv, headers and rows) and a *_resume.f2fis batch file calls only the
+#    drivers with missing or broken results
+resume      = 0
+
+# 1: sampling study instead of the full sweep. The secondary parameters of the study file are
+#    sampled over their ranges and crossed with the (few) axes values of the study file
+#    (batch file and design csv named in the study file)
+sampling    = 0
+Study_File  = os.path.join(script_dir, "study_uDSS_secondary.json")
+
+# 1: thin drivers of a few hundred bytes that 'program call' the shared template and body
+#    files instead of copying them (a fix to the body then needs no regeneration)
+thin        = 0
+
+# 1: pack the cases that differ only in Ko into shared drivers (batch_undrainedDSS_cyc_packed.f2fis
+#    for the full sweep), named e.g. uDSS_cyc_Dr35_sig1_a0.0_Ko0.3to1.2
+packing     = 0
+
+# >0: rows per element csv file. The history interval of each driver is set from its steps
+#     predicted by the cost model (0 keeps the interval of the body)
+history_budget = 0
+
+# 1: warm start from saved initial states (settings in the "warm_start" section of sweep_uDSS_cyc.json)
+warm_start  = 0
+
+# 1: time-step convergence study instead of the full sweep. The cases of the ladder file are run at
+#    every increment of its ladder (batch file named in the ladder file)
+convergence = 0
+Ladder_File = os.path.join(script_dir, "ladder_uDSS_maxStrInc.json")
+
+# >0: drivers save a checkpoint every this many cycles (and when loading ends)
+checkpoints = 0
+
+# 1: extend round instead of the full sweep. Cases with a checkpoint in results/ and CSRs that did
+#    not reach 3% strain within the cycle limit continue for extend_cycles more cycles from their
+#    checkpoint (batch_undrainedDSS_cyc_extend.f2fis)
+extend      = 0
+extend_cycles = 50
+
+spec = load_spec(Spec_File)
+cost_model  = learn_cost_model(spec) if ordering == 1 else None
+results_dir = os.path.join(script_dir, "results")
+
+if adaptive == 1:
+    sweep_spec, cases = plan_followups(spec, results_dir, adaptive_criterion)
+    batch_file = "batch_undrainedDSS_cyc_adaptive.f2fis"
+elif extend == 1:
+    sweep_spec, cases = plan_extensions(spec, results_dir, extend_cycles, checkpoints)
+    batch_file = "batch_undrainedDSS_cyc_extend.f2fis"
+elif convergence == 1:
+    ladder = load_ladder(Ladder_File)
+    sweep_spec, cases = plan_ladder(spec, ladder)
+    batch_file = ladder["batch_file"]
+elif sampling == 1:
+    study = load_study(Study_File)
+    sweep_spec, cases = plan_study(spec, study)
+    batch_file = study["batch_file"]
+else:
+    sweep_spec, cases = spec, None
+    batch_file = spec["batch_file"]
+
+if checkpoints > 0 and extend != 1:
+    sweep_spec = with_checkpoints(sweep_spec, checkpoints)
+
+if resume == 1:
+    cases      = incomplete_cases(sweep_spec, cases if cases is not None else iter_cases(sweep_spec), results_dir)
+    batch_file = batch_file.replace(".f2fis", "_resume.f2fis")
+
+if history_budget > 0:
+    sweep_spec, cases = with_history_budget(sweep_spec, cases if cases is not None else iter_cases(sweep_spec),
+                                            history_budget, cost_model or learn_cost_model(spec),
+                                            pack = (packing == 1))
+if packing == 1:
+    batch_file = batch_file.replace(".f2fis", "_packed.f2fis")
+if thin == 1 and cases is not None:
+    cases = list(cases)
+run_sweep(sweep_spec, cases, batch_file = batch_file,
+          incremental = (incremental == 1), shards = shards, cost_model = cost_model,
+          thin = (thin == 1), pack = (packing == 1), warm_start = (warm_start == 1),
+          extend = (extend == 1))
+if thin == 1:
+    validate_thin(sweep_spec, cases, pack = (packing == 1))
 ''' EoF'''
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Adaptive CSR selection for undrained cyclic DSS drivers
+- reads the existing <basefile>_csrN.csv results of a sweep (and of previous adaptive
+  rounds, <basefile> with the tag _r1, _r2, ...) and keeps, for the chosen triggering
+  criterion, the points that triggered in more than one cycle and before _maxCycles
+- a case is poorly bracketed when fewer than 3 such points exist or when they do not
+  bracket N = 15 cycles; only those cases get a follow-up driver
+- the follow-up driver runs five new CSRs (_csr_in1 ... _csr_in5 in _var_inputs, read by
+  _calc_variables of DSS_cyclic_undrained.f2fis) placed where the current CSR-N estimate
+  predicts 6 to 35 cycles (4 to 60 cycles when the estimate rests on less than 2 points)
+- CSR-N estimate: power law CSR = a*N^-b fitted in log-log space; with a single usable
+  point b defaults to 0.3; without any, CRR15 is bracketed between the highest CSR that
+  never triggered and the lowest CSR that triggered within one cycle
+- these two CSRs bound CRR15 in every case: the estimate is kept inside them (a quarter of
+  the interval, in log space, away from either end) and the spread of the five CSRs is
+  narrowed so that none is placed at or beyond a CSR that already failed or never triggered
+- follow-up drivers keep the naming of the original case with the round tag after Dr,
+  e.g. uDSS_cyc_Dr35_r1_sig1_a0.0_Ko0.5, so decode_name still works
+"""
+import csv
+import math
+import os
+
+from flac_files import (body_constants, summary_file)
+from sweep      import (iter_cases, resolve_case)
+
+CRITERIA     = ["Ncyc_to_98%_ru", "Ncyc_to_1%_strain", "Ncyc_to_3%_strain"]
+N_TARGET     = 15.0
+B_DEFAULT    = 0.3
+N_PLACEMENT  = {"narrow": [35.0, 22.0, 15.0, 10.0, 6.0],
+                "wide":   [60.0, 30.0, 15.0, 8.0, 4.0]}
+
+#------------------------------------------------------------
+def read_csrN(file_path):
+    with open(file_path, "r", newline="") as f:
+        return [{key: float(value) for key, value in row.items()} for row in csv.DictReader(f)]
+
+def round_tag(k):
+    return "_r{}".format(k)
+
+# All csrN rows of a case: original run and every adaptive round found in results_dir
+def case_rows(spec, case, results_dir):
+    rows, k = [], 0
+    while True:
+        tagged = resolve_case(spec, dict(case, tag=round_tag(k) if k else ""))
+        file   = os.path.join(results_dir, summary_file(tagged["basefile"]))
+        if not os.path.isfile(file):
+            return rows, k
+        rows += read_csrN(file)
+        k    += 1
+
+#------------------------------------------------------------
+# Least squares line through (log N, log CSR) -> (a, b) of CSR = a*N^-b
+def loglog_fit(N, CSR):
+    x  = [math.log10(n) for n in N]
+    y  = [math.log10(c) for c in CSR]
+    xm = sum(x) / len(x)
+    ym = sum(y) / len(y)
+    sxx = sum((xi - xm) ** 2 for xi in x)
+    slope = sum((xi - xm) * (yi - ym) for xi, yi in zip(x, y)) / sxx if sxx > 0 else -B_DEFAULT
+    return 10.0 ** (ym - slope * xm), -slope
+
+# (highest CSR that never triggered, lowest CSR that triggered within one cycle), None if none
+def crr_bounds(rows, criterion, max_cycles):
+    fast  = [r["CSR"] for r in rows if 0.0 < r[criterion] <= 1.0]
+    never = [r["CSR"] for r in rows if r[criterion] <= 0.0 or r[criterion] >= max_cycles]
+    return (max(never) if never else None), (min(fast) if fast else None)
+
+# CRR15 estimate moved inside the bounds, a quarter of their (log) interval from either end
+def clamp_crr(crr, low, high):
+    if low is not None and high is not None and high > low:
+        margin = 0.25 * math.log(high / low)
+        return min(max(crr, low * math.exp(margin)), high * math.exp(-margin))
+    if high is not None:
+        return min(crr, high / 1.25)
+    if low is not None:
+        return max(crr, low * 1.25)
+    return crr
+
+# Returns (poor bracket?, CRR15 estimate, b, spread) for the rows of one case
+def assess(rows, criterion, max_cycles):
+    usable = [(r[criterion], r["CSR"]) for r in rows if 1.0 < r[criterion] < max_cycles]
+    low, high = crr_bounds(rows, criterion, max_cycles)
+
+    N = [n for n, _ in usable]
+    poor = len(usable) < 3 or not (min(N) <= N_TARGET <= max(N))
+
+    if len(usable) >= 2:
+        a, b = loglog_fit(N, [c for _, c in usable])
+        b    = min(max(b, 0.1), 0.6)
+        crr  = a * N_TARGET ** -b if len(set(N)) > 1 else usable[0][1] * (usable[0][0] / N_TARGET) ** b
+        return poor, clamp_crr(crr, low, high), b, "narrow"
+    if len(usable) == 1:
+        n, c = usable[0]
+        return poor, clamp_crr(c * (n / N_TARGET) ** B_DEFAULT, low, high), B_DEFAULT, "wide"
+    if low is not None and high is not None:
+        return poor, math.sqrt(high * low), B_DEFAULT, "wide"
+    if high is not None:
+        return poor, high / 2.0, B_DEFAULT, "wide"
+    return poor, low * 1.5, B_DEFAULT, "wide"
+
+# Five CSRs around crr; b is narrowed so that they stay strictly between the bounds
+def placed_csrs(crr, b, spread, low=None, high=None):
+    Ns = N_PLACEMENT[spread]
+    if high is not None and high > crr:
+        b = min(b, 0.9 * math.log(high / crr) / math.log(N_TARGET / min(Ns)))
+    if low is not None and low < crr:
+        b = min(b, 0.9 * math.log(crr / low) / math.log(max(Ns) / N_TARGET))
+    return [round(crr * (N_TARGET / n) ** b, 5) for n in Ns]
+
+#------------------------------------------------------------
+# Follow-up cases for every poorly bracketed case of the sweep with results
+# - returns (spec for the follow-up sweep, list of cases)
+def plan_followups(spec, results_dir, criterion="Ncyc_to_3%_strain"):
+    with open(spec["body"], "r") as f:
+        max_cycles = body_constants(f.read()).get("_maxCycles", 100.0)
+
+    followup_spec = dict(spec)
+    followup_spec["inputs"] = spec["inputs"] + [["_csr_in{}".format(i), "csr_in{}".format(i)] for i in range(1, 6)]
+
+    cases = []
+    for case in iter_cases(spec):
+        rows, n_rounds = case_rows(spec, case, results_dir)
+        if not rows:
+            continue
+        poor, crr, b, spread = assess(rows, criterion, max_cycles)
+        if not poor:
+            continue
+        values = dict(case, tag=round_tag(n_rounds))
+        for i, csr in enumerate(placed_csrs(crr, b, spread, *crr_bounds(rows, criterion, max_cycles)), 1):
+            values["csr_in{}".format(i)] = csr
+        cases.append(resolve_case(followup_spec, values))
+        print("  {}: {} rows, CRR15 ~ {:.3f}, b = {:.2f} -> {}".format(
+              case["basefile"], len(rows), crr, b, cases[-1]["basefile"]))
+    return followup_spec, cases
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+FLAC batch files: header, 'program call' lines and helpers shared by the sweep tools
+- expand_calls inlines the files called by a (thin) driver, as FLAC reads them
+- dependency graph of warm started drivers (<batch name>_graph.json): the state file
+  saved by every state driver and the state driver that every other driver waits for
+"""
+import filecmp
+import glob
+import json
+import os
+import re
+
+BUFFER_SIZE  = 1 << 16
+
+CALL_LINE    = "program call '{}'\n"
+
+_PROGRAM = re.compile(r"^\s*program\s+(call|directory)\s+'([^']*)'", re.IGNORECASE)
+
+BATCH_HEADER = (";-----------------------------------------------------------------------\n"
+                ";                     FLAC batch calling of input files                 \n"
+                ";-----------------------------------------------------------------------\n"
+                "\n")
+
+#------------------------------------------------------------
+def write_batch(batch_path, driver_files, preamble=""):
+    with open(batch_path, "w", buffering=BUFFER_SIZE) as batch:
+        batch.write(BATCH_HEADER)
+        batch.write(preamble)
+        for driver_file in driver_files:
+            batch.write(CALL_LINE.format(driver_file))
+
+# Replaces file_path by tmp_path only if contents differ (keeps mtime of unchanged files)
+def replace_if_changed(tmp_path, file_path):
+    if os.path.isfile(file_path) and filecmp.cmp(tmp_path, file_path, shallow=False):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, file_path)
+    return True
+
+# Files called by a batch file or a driver ('program call' lines), in order
+# - paths are relative to the folder of file_path, following 'program directory' lines
+def called_files(file_path):
+    directory, files = "", []
+    with open(file_path, "r") as f:
+        for match in map(_PROGRAM.match, f):
+            if not match:
+                continue
+            command, path = match.groups()
+            if command.lower() == "directory":
+                directory = os.path.join(directory, path)
+            else:
+                files.append(os.path.normpath(os.path.join(directory, path)))
+    return files
+
+# Text of a FLAC input file with its 'program call' lines replaced by the called files
+# (recursively), as FLAC reads it; called paths are relative to work_dir, FLAC's current
+# folder, which defaults to the folder of file_path
+def expand_calls(file_path, work_dir=None):
+    work_dir = work_dir or os.path.dirname(os.path.abspath(file_path))
+    parts    = []
+    with open(file_path, "r") as f:
+        for line in f:
+            match = _PROGRAM.match(line)
+            if match and match.group(1).lower() == "call":
+                parts.append(expand_calls(os.path.join(work_dir, match.group(2)), work_dir))
+                parts.append(line[match.end():].lstrip(" \t"))
+            else:
+                parts.append(line)
+    return "".join(parts)
+
+#------------------------------------------------------------
+def graph_path(batch_path):
+    return os.path.splitext(batch_path)[0] + "_graph.json"
+
+# saves: {state driver file: state file}, depends: {driver file: state driver file}
+def write_graph(file_path, saves, depends):
+    with open(file_path, "w") as f:
+        json.dump({"saves": saves, "depends": depends}, f, indent=1)
+
+# Graphs of all batch files in out_dir merged -> (saves, depends)
+def read_graphs(out_dir):
+    saves, depends = {}, {}
+    for file_path in glob.glob(os.path.join(out_dir, "*_graph.json")):
+        with open(file_path, "r") as f:
+            graph = json.load(f)
+        saves.update(graph["saves"])
+        depends.update(graph["depends"])
+    return saves, depends
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Time-step convergence study of the maximum strain increment per step (_maxStrInc)
+- a ladder file (JSON, next to the sweep spec) holds:
+    increments : ladder of _maxStrInc values, the smallest one is the reference
+    axes       : values of the sweep axes the ladder is run for (defaults to the spec axes;
+                 e.g. a single alpha and Ko, all densities and confinements)
+    group_by   : axes the recommendation is given for (e.g. ["Dr", "sig_vc"])
+    tolerance  : largest relative difference from the reference that is accepted
+    batch_file : batch file of the ladder drivers
+- every case is run at every increment: _maxStrInc_in in _var_inputs replaces _maxStrInc of the
+  body, and the drivers carry the tag _inc1e-06, _inc2.5e-05, ... after Dr so decode_name still works
+- results are compared with the ones of the reference increment:
+    undrained : CRR15 from _csrN.csv (see sampling.crr15)
+    drained   : G/Gmax and damping of element 3 from _MRD.csv at every strain amplitude
+                (damping differences relative to at least 1% damping)
+- for every group the largest increment whose cases, and the cases of all smaller increments,
+  stay within the tolerance is reported and written to <batch file>_convergence.csv
+"""
+import csv
+import json
+import os
+
+from flac_files import (body_constants, drainage, summary_file)
+from sampling   import crr15
+from sweep      import (iter_cases, resolve_case)
+
+DAMPING_FLOOR = 1.0         # %
+
+#------------------------------------------------------------
+def load_ladder(ladder_file):
+    with open(ladder_file, "r") as f:
+        ladder = json.load(f)
+    ladder["increments"] = sorted(float(inc) for inc in ladder["increments"])
+    tags = [increment_tag(inc) for inc in ladder["increments"]]
+    if len(set(tags)) != len(tags):
+        raise ValueError("increments of {} give the same driver tag twice: {}".format(ladder_file, tags))
+    return ladder
+
+# Tag of an increment, repr of the float so that it reads back exactly (1e-05 -> _inc1e-05,
+# 2.5e-06 -> _inc2.5e-06)
+def increment_tag(increment):
+    return "_inc{!r}".format(float(increment))
+
+# Spec and cases of a ladder: every case of the ladder axes at every increment
+def plan_ladder(spec, ladder):
+    ladder_spec = dict(spec)
+    ladder_spec["inputs"] = spec["inputs"] + [["_maxStrInc_in", "maxStrInc_in"]]
+    axes  = dict(spec["axes"], **ladder.get("axes", {}))
+    cases = [resolve_case(spec, dict(base, tag=increment_tag(inc), maxStrInc_in=inc))
+             for base in iter_cases(spec, axes) for inc in ladder["increments"]]
+    print("Increment ladder: {} increments x {} cases".format(len(ladder["increments"]),
+                                                             len(cases) // len(ladder["increments"])))
+    return ladder_spec, cases
+
+#------------------------------------------------------------
+# Responses of one driver, {name: value} (None when its results are missing)
+def _read_MRD(results_dir, basefile):
+    file = os.path.join(results_dir, summary_file(basefile))
+    if not os.path.isfile(file):
+        return None
+    with open(file, "r", newline="") as f:
+        return {row["eps_xy(%)"]: (float(row["G/Gmax3"]), float(row["D3(%)"])) for row in csv.DictReader(f)}
+
+def responses(results_dir, basefile, max_cycles):
+    if drainage(basefile) == "u":
+        value = crr15(results_dir, basefile, max_cycles=max_cycles)
+        return None if value is None else {"CRR15": value}
+    rows = _read_MRD(results_dir, basefile)
+    if rows is None:
+        return None
+    values = {}
+    for strain, (ratio, damping) in rows.items():
+        values["G/Gmax@" + strain] = ratio
+        values["D@" + strain]      = damping
+    return values
+
+# Largest relative difference between the responses of a run and of the reference run
+def difference(values, reference):
+    worst = 0.0
+    for name, ref in reference.items():
+        if name not in values:
+            return float("inf")
+        floor = DAMPING_FLOOR if name.startswith("D@") else 0.0
+        worst = max(worst, abs(values[name] - ref) / max(abs(ref), floor, 1.0e-12))
+    return worst
+
+#------------------------------------------------------------
+# Compares every increment with the reference one, per group of the ladder
+# - returns {group values: recommended increment or None}
+def compare_ladder(spec, ladder, results_dir=None):
+    results_dir = results_dir or os.path.join(spec["out_dir"], "results")
+    with open(spec["body"], "r") as f:
+        max_cycles = body_constants(f.read()).get("_maxCycles", 100.0)
+    increments = ladder["increments"]
+    group_by   = [a for a in ladder.get("group_by", []) if a in spec["axes"]]
+    axes       = dict(spec["axes"], **ladder.get("axes", {}))
+
+    # worst difference per (group, increment); None when a result is missing
+    worst = {}
+    for base in iter_cases(spec, axes):
+        group = tuple(base[a] for a in group_by)
+        runs  = [responses(results_dir, resolve_case(spec, dict(base, tag=increment_tag(inc)))["basefile"], max_cycles)
+                 for inc in increments]
+        for inc, values in zip(increments, runs):
+            key = (group, inc)
+            if values is None or runs[0] is None or worst.get(key, 0.0) is None:
+                worst[key] = None
+            else:
+                worst[key] = max(worst.get(key, 0.0), difference(values, runs[0]))
+
+    tolerance   = ladder.get("tolerance", 0.02)
+    recommended = {}
+    rows        = []
+    for group in sorted({g for g, _ in worst}):
+        chosen = None
+        for inc in increments:
+            diff = worst[(group, inc)]
+            rows.append(list(group) + [inc, "" if diff is None else "{:.5f}".format(diff),
+                                       "" if diff is None else int(diff <= tolerance)])
+            if diff is None or diff > tolerance:
+                break
+            chosen = inc
+        recommended[group] = chosen
+
+    out_path = os.path.join(spec["out_dir"], os.path.splitext(ladder["batch_file"])[0] + "_convergence.csv")
+    with open(out_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(group_by + ["maxStrInc", "max_rel_difference", "within_tolerance"])
+        writer.writerows(rows)
+    print("Largest _maxStrInc within {:g} of {:g} -> {}".format(tolerance, increments[0], out_path))
+    for group, inc in recommended.items():
+        label = ", ".join("{} = {}".format(a, v) for a, v in zip(group_by, group)) or "all cases"
+        print("  {}: {}".format(label, "{:g}".format(inc) if inc is not None else "results missing"))
+    return recommended
+
+if __name__ == "__main__":
+    import argparse
+    from sweep import load_spec
+    parser = argparse.ArgumentParser(description="Compare the results of an increment ladder with its finest increment")
+    parser.add_argument("spec", help="JSON sweep spec file")
+    parser.add_argument("ladder", help="JSON ladder file")
+    parser.add_argument("--results", default=None, help="results folder (default: results/ next to the drivers)")
+    args = parser.parse_args()
+    compare_ladder(load_spec(args.spec), load_ladder(args.ladder), args.results)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Runtime cost model of PM4Sand2D drivers, learned from previous runs
+- a prior number of FLAC steps is computed for every driver from its _var_inputs and the
+  constants of the driver body (_maxStrInc, _strainLimit(i), _nCycles, _maxCycles, ...):
+    drained : exact, sum over strain levels of _nCycles * 4 * limit / min(_maxStrInc, limit/50)
+    undrained: rough, _maxCycles cycles at ~0.1% single amplitude strain (the real number
+               depends on when the elements trigger, which is what the model learns)
+- previous runs are read from the results folder: the number of rows of the element
+  files times the history interval (_his_step_in of the driver or the body default) gives
+  the steps actually taken, and the run log of
+  the orchestrator or else the spacing of the result time stamps (drivers run one after
+  the other in a batch) gives wall times
+- log(steps) is regressed (ridge) on log(prior steps) and the numeric driver inputs, and
+  the median seconds per step converts steps to wall time
+- without previous runs the prior is used as is (relative cost units)
+- used by the generators for longest-job-first ordering, for balancing shards and for the
+  history interval of every driver under a row budget (with_history_budget)
+"""
+import glob
+import json
+import math
+import os
+
+import numpy as np
+
+from extend       import EXTEND_TAG
+from flac_files import (body_constants, count_rows, element_file, existing_outputs,
+                        expected_outputs, read_var_inputs, strain_limits)
+from orchestrator import read_run_log
+from sweep        import (case_inputs, case_overrides)
+
+# inputs that change the output of a driver but not the steps it takes
+NOT_FEATURES = ["_his_step_in"]
+
+#------------------------------------------------------------
+class CostModel:
+    def __init__(self, body_text, ridge=1.0e-3):
+        self.constants = body_constants(body_text)
+        self.ridge     = ridge
+        self.features  = []          # names of the numeric inputs used as regressors
+        self.theta     = None        # regression coefficients, None = prior only
+        self.rate      = None        # seconds per step, None = costs in steps
+
+    def prior_steps(self, params):
+        c   = self.constants
+        inc = params.get("_maxStrInc_in", 0) or c.get("_maxStrInc", 1.0e-5)
+        if "_strainCount" in params:     # drained, strain controlled
+            steps = 0.0
+            for limit in strain_limits(c, params["_strainCount"]):
+                steps += params.get("_nCycles", 1) * 4.0 * limit / min(inc, limit / 50.0)
+            return max(steps, 1.0)
+        return c.get("_maxCycles", 100) * 4.0 * 0.001 / inc
+
+    def _row(self, params):
+        return [1.0, math.log(self.prior_steps(params))] + [float(params.get(name, 0.0)) for name in self.features]
+
+    #------------------------------------------------------------
+    # observations: list of dicts with 'params', 'steps' and optionally 'seconds'
+    def fit(self, observations):
+        observations = [obs for obs in observations if obs["steps"] > 0]
+        numeric = set()
+        for obs in observations:
+            numeric.update(k for k, v in obs["params"].items() if isinstance(v, (int, float)))
+        numeric -= set(NOT_FEATURES)
+        self.features = sorted(numeric)
+
+        if len(observations) >= 3:
+            X = np.array([self._row(obs["params"]) for obs in observations])
+            y = np.log([obs["steps"] for obs in observations])
+            penalty = self.ridge * np.eye(X.shape[1])
+            penalty[0, 0] = 0.0      # intercept not penalized
+            self.theta = np.linalg.solve(X.T @ X + penalty, X.T @ y)
+
+        rates = [obs["seconds"] / obs["steps"] for obs in observations if obs.get("seconds")]
+        if rates:
+            self.rate = float(np.median(rates))
+        return self
+
+    def predict_steps(self, params):
+        if self.theta is None:
+            return self.prior_steps(params)
+        return float(np.exp(np.dot(self._row(params), self.theta)))
+
+    # Predicted wall time (seconds) or steps if no timed runs were observed
+    def predict(self, params):
+        steps = self.predict_steps(params)
+        return steps * self.rate if self.rate else steps
+
+    def save(self, file_path):
+        with open(file_path, "w") as f:
+            json.dump({"features": self.features, "rate": self.rate,
+                       "theta": None if self.theta is None else list(self.theta)}, f, indent=1)
+
+#------------------------------------------------------------
+# Previous runs of the drivers in out_dir whose outputs are complete in results_dir
+# - parameters come from the sweep manifests if present, otherwise from the drivers
+# - wall time of a driver comes from the run log of orchestrator.py when the driver was run
+#   by it, otherwise it is the time stamp of its last output minus the one of the driver
+#   that finished before it (gaps longer than max_gap seconds are treated as pauses)
+# - runs continued by an extend run are left untimed
+def observe_runs(out_dir, results_dir, his_step, max_gap=6 * 3600.0):
+    params = {}
+    for manifest in glob.glob(os.path.join(out_dir, "*_manifest.json")):
+        with open(manifest, "r") as f:
+            for basefile, entry in json.load(f)["drivers"].items():
+                params[basefile] = entry["params"]
+    if not params:
+        for driver in glob.glob(os.path.join(out_dir, "*.f2fis")):
+            inputs = read_var_inputs(driver)
+            if "_basefile" in inputs:
+                params[inputs["_basefile"]] = inputs
+
+    observations = []
+    for basefile, inputs in params.items():
+        if len(existing_outputs(results_dir, basefile)) < len(expected_outputs(basefile)):
+            continue
+        end_time = max(os.path.getmtime(os.path.join(results_dir, f)) for f in expected_outputs(basefile))
+        rows     = count_rows(os.path.join(results_dir, element_file(basefile, 1)))
+        interval = inputs.get("_his_step_in", 0) or his_step
+        observations.append({"basefile": basefile, "params": inputs,
+                             "steps": rows * interval, "end_time": end_time})
+
+    observations.sort(key=lambda obs: obs["end_time"])
+    for previous, obs in zip(observations[:-1], observations[1:]):
+        gap = obs["end_time"] - previous["end_time"]
+        if 0.0 < gap <= max_gap:
+            obs["seconds"] = gap
+    logged = read_run_log(results_dir)
+    for obs in observations:
+        if obs["basefile"] in logged:
+            obs["seconds"] = logged[obs["basefile"]]
+        if obs["basefile"] + EXTEND_TAG in logged:
+            # the csv files of an extended run hold the cycles of both runs
+            obs.pop("seconds", None)
+    return observations
+
+def learn_cost_model(spec, results_dir=None):
+    with open(spec["body"], "r") as f:
+        model = CostModel(f.read())
+    results_dir  = results_dir or os.path.join(spec["out_dir"], "results")
+    observations = []
+    if os.path.isdir(results_dir):
+        observations = observe_runs(spec["out_dir"], results_dir, model.constants["_his_step"])
+    model.fit(observations)
+    print("Cost model: {} previous runs observed, {} timed".format(
+          len(observations), sum(1 for obs in observations if obs.get("seconds"))))
+    return model
+
+#------------------------------------------------------------
+# History row budget: interval (steps) per driver so that its element files hold about
+# 'budget' rows, from the steps predicted by the model
+def history_interval(model, params, budget):
+    return max(1, int(math.ceil(model.predict_steps(params) / float(budget))))
+
+# Spec and cases with the _his_step_in input of the drivers set for a row budget
+# - pack = True gives the cases of one pack group (see sweep.pack_cases) the interval of
+#   their longest case, so they still share every input but the pack axis
+def with_history_budget(spec, cases, budget, model, pack=False):
+    budget_spec = dict(spec, inputs=spec["inputs"] + [["_his_step_in", "his_step_in"]])
+    cases       = list(cases)
+    intervals   = [history_interval(model, dict(case_inputs(spec, case) + case_overrides(spec, case)), budget)
+                   for case in cases]
+    if pack:
+        group = lambda case: spec["pack"]["name"].format(**dict(case, pack_first="", pack_last=""))
+        longest = {}
+        for case, interval in zip(cases, intervals):
+            longest[group(case)] = max(interval, longest.get(group(case), 1))
+        intervals = [longest[group(case)] for case in cases]
+    print("History interval for {} rows per element file: {} to {} steps".format(
+          budget, min(intervals, default=0), max(intervals, default=0)))
+    return budget_spec, [dict(case, his_step_in=interval) for case, interval in zip(cases, intervals)]
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Extend runs of undrained cyclic DSS drivers: more cycles from a checkpoint instead of a rerun
+- drivers generated with checkpoints (_checkpoint_in > 0 in _var_inputs, see with_checkpoints)
+  save the model to <basefile>_ckpt.sav every _checkpoint_in cycles of the 1st element and when
+  the loading ends; the orchestrator moves it into results/ with the csv files
+- the loading of a run goes on until its 1st element (lowest CSR) reaches _maxStrain or the
+  cycle limit: a run whose 1st element ends below _maxStrain (last row of <basefile>_1.csv)
+  was stopped by the limit, at the last Ncyc of that file
+- such a case is extended when its checkpoint is in results/ and one of its CSRs did not reach
+  the triggering criterion (Ncyc 0 or at the limit), e.g. the low CSRs that the Ksigma/Kalpha
+  figures treat as 'CSR = 0'; the extend run raises the limit by extra_cycles (_maxCycles_in)
+- the extend driver (<basefile>_ext.f2fis) restores the checkpoint and runs the loading and
+  export part of the body (after its ';=== checkpoint: cyclic loading ===' line) again. FLAC
+  keeps the histories in the saved model, so the element and summary csv files are written
+  again under the same names with the earlier cycles followed by the new ones, and the new
+  checkpoint allows a further extension
+- the body saves the checkpoint from the top level, between calls of _CSR_loading, never from
+  inside its running loop
+- the run log of the orchestrator keeps extend runs under their driver name (<basefile>_ext),
+  apart from the run they extend; the cost model leaves an extended run untimed, as its csv
+  files then hold the cycles of both runs
+"""
+import math
+import os
+
+from adaptive_csr import read_csrN
+from flac_files   import (body_constants, checkpoint_file, element_file, head_and_tail, summary_file)
+from sweep        import iter_cases
+
+EXTEND_TAG = "_ext"
+
+#------------------------------------------------------------
+# Spec whose drivers save checkpoints every 'cycles' cycles
+def with_checkpoints(spec, cycles):
+    return dict(spec, inputs=spec["inputs"] + [["_checkpoint_in", cycles]])
+
+# Where a finished run stopped: (Ncyc, shear strain %) of the last row of its 1st element file
+def run_end(results_dir, basefile):
+    fields = head_and_tail(os.path.join(results_dir, element_file(basefile, 1)))[1].split(",")
+    return float(fields[0]), float(fields[2])
+
+def unfinished_rows(rows, criterion, limit):
+    return [r for r in rows if r[criterion] <= 0.0 or r[criterion] >= limit]
+
+#------------------------------------------------------------
+# Extend run cases for every case with a checkpoint and unfinished CSRs
+# - cases default to the full sweep (pass the cases of adaptive rounds or studies to extend them)
+# - returns (spec for the extend sweep, list of cases)
+def plan_extensions(spec, results_dir, extra_cycles, checkpoint_cycles=0, cases=None,
+                    criterion="Ncyc_to_3%_strain"):
+    extend_spec = dict(spec)
+    extend_spec["inputs"] = [i for i in spec["inputs"] if i[0] != "_checkpoint_in"] + [
+                             ["_maxCycles_in", "maxCycles_in"], ["_checkpoint_in", "checkpoint_in"]]
+
+    with open(spec["body"], "r") as f:
+        max_strain_pct = 100.0 * body_constants(f.read()).get("_maxStrain", 0.04)
+
+    extended = []
+    for case in (iter_cases(spec) if cases is None else cases):
+        basefile = case["basefile"]
+        summary  = os.path.join(results_dir, summary_file(basefile))
+        if not (os.path.isfile(summary) and os.path.isfile(os.path.join(results_dir, checkpoint_file(basefile)))):
+            continue
+        limit, strain = run_end(results_dir, basefile)
+        if abs(strain) >= max_strain_pct:
+            continue
+        unfinished = unfinished_rows(read_csrN(summary), criterion, limit)
+        if not unfinished:
+            continue
+        extended.append(dict(case, driver=basefile + EXTEND_TAG,
+                             maxCycles_in=int(math.ceil(limit)) + extra_cycles,
+                             checkpoint_in=checkpoint_cycles or extra_cycles))
+        print("  {}: {} CSRs without {} in {:g} cycles -> {} cycles".format(
+              basefile, len(unfinished), criterion, limit, extended[-1]["maxCycles_in"]))
+    print("{} drivers to extend by {} cycles".format(len(extended), extra_cycles))
+    return extend_spec, extended
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+What the generators need to know about the FLAC side of a sweep
+- csv headers and file names produced by the _five_files and _summary FISH functions
+  of the driver bodies (<basefile>_1.csv ... <basefile>_5.csv and <basefile>_csrN.csv
+  for undrained / <basefile>_MRD.csv for drained drivers)
+- reading back the _var_inputs block (and _var_overrides) of a generated driver
+- checkpoint and saved state files of the drivers
+- reading numeric constants (_maxStrInc, _his_step, _maxCycles, _strainLimit(i), ...)
+  from a driver body
+"""
+import os
+import re
+
+N_ELEMENTS = 5
+
+# Default FLAC history interval (steps) when the body does not set 'history interval'
+DEFAULT_HISTORY_INTERVAL = 10
+
+ELEMENT_HEADERS = {"u": "Ncyc,CSR,Shear_strain_%,Vert_eff_stress_atm,sigv/sigvo,ru",
+                   "d": "eps_xy(%),eps_yy(%),tauxy(kPa),tauxy/sigvc,sigv(kPa),sigv/sigvc"}
+
+SUMMARY_HEADERS = {"csrN": "CSR,Ncyc_to_98%_ru,Ncyc_to_1%_strain,Ncyc_to_3%_strain",
+                   "MRD":  "eps_xy(%)," + ",".join("G{0}(kPa),G/Gmax{0},D{0}(%)".format(n)
+                                                   for n in range(1, N_ELEMENTS + 1))}
+
+#------------------------------------------------------------
+# basefile naming: first letter is the drainage ('u' or 'd')
+def drainage(basefile):
+    return basefile[0]
+
+def summary_tag(basefile):
+    return "csrN" if drainage(basefile) == "u" else "MRD"
+
+def element_file(basefile, n):
+    return "{}_{}.csv".format(basefile, n)
+
+def summary_file(basefile):
+    return "{}_{}.csv".format(basefile, summary_tag(basefile))
+
+def expected_outputs(basefile):
+    return [element_file(basefile, n) for n in range(1, N_ELEMENTS + 1)] + [summary_file(basefile)]
+
+# Model saved by drivers with checkpoints (see _checkpoint of DSS_cyclic_undrained.f2fis)
+def checkpoint_file(basefile):
+    return "{}_ckpt.sav".format(basefile)
+
+# Files named in the 'model save' and 'model restore' lines of a driver (warm start states,
+# extend runs): {"save": file, "restore": file}
+_STATE_LINE = re.compile(r"^\s*model\s+(save|restore)\s+'([^']*)'", re.IGNORECASE | re.MULTILINE)
+
+def state_files(driver_text):
+    return {command.lower(): name for command, name in _STATE_LINE.findall(driver_text)}
+
+#------------------------------------------------------------
+# Header and last non-empty line of a csv file, reading only its tail
+TAIL_BYTES = 4096
+
+def head_and_tail(file_path):
+    with open(file_path, "rb") as f:
+        header = f.readline().decode("utf-8", "replace").strip()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - TAIL_BYTES))
+        tail = f.read().decode("utf-8", "replace")
+    lines = [line for line in tail.splitlines() if line.strip()]
+    return header, (lines[-1].strip() if lines else "")
+
+# Number of data rows (lines after the header) of a csv file
+def count_rows(file_path):
+    lines = 0
+    last  = b"\n"
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            lines += chunk.count(b"\n")
+            last   = chunk[-1:]
+    if last != b"\n":
+        lines += 1          # last line without newline
+    return max(lines - 1, 0)
+
+#------------------------------------------------------------
+# _var_inputs block (and _var_overrides function) of a generated driver -> {fish name: value}
+_VAR_LINE = re.compile(r"^\s*(_\w+(?:\(\d+\))?)\s*=\s*(.+?)\s*$")
+
+def parse_value(text):
+    text = text.strip()
+    if text[:1] in ("'", '"'):
+        return text[1:-1]
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+def parse_var_inputs(driver_text):
+    values = {}
+    inside = False
+    for line in driver_text.splitlines():
+        if line.strip().startswith(("fish def _var_inputs", "fish def _var_overrides")):
+            inside = True
+            continue
+        if inside:
+            if line.strip().startswith("end"):
+                inside = False
+                continue
+            match = _VAR_LINE.match(line.split(";")[0])
+            if match:
+                values[match.group(1)] = parse_value(match.group(2))
+    return values
+
+def read_var_inputs(driver_path):
+    with open(driver_path, "r") as f:
+        return parse_var_inputs(f.read())
+
+# Inputs of every case run by a driver: packed drivers (see sweep.pack_cases) hold _nPack
+# cases whose own inputs are the array entries <name>_k(i), e.g. _Ko_k(2), _basefile_k(2)
+def pack_members(params):
+    if "_nPack" not in params:
+        return [params]
+    members = []
+    for i in range(1, int(params["_nPack"]) + 1):
+        member = {k: v for k, v in params.items() if "(" not in k and k != "_nPack"}
+        suffix = "_k({})".format(i)
+        member.update({k[:-len(suffix)]: v for k, v in params.items() if k.endswith(suffix)})
+        members.append(member)
+    return members
+
+#------------------------------------------------------------
+# Numeric constants assigned in a driver body, first assignment wins
+# - array entries are returned with their index, e.g. '_strainLimit(3)'
+# - '_his_step' is evaluated from its expression in terms of _maxStrInc
+_CONSTANT = re.compile(r"^\s*(_\w+(?:\(\d+\))?)\s*=\s*([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)\s*(?:;.*)?$")
+
+def body_constants(body_text):
+    constants = {}
+    for line in body_text.splitlines():
+        match = _CONSTANT.match(line)
+        if match and match.group(1) not in constants:
+            constants[match.group(1)] = float(match.group(2))
+
+    if "_maxStrInc" in constants and "history interval [_his_step]" in body_text:
+        constants.setdefault("_his_step", int(50 * 1.0e-5 / constants["_maxStrInc"]))
+    constants.setdefault("_his_step", DEFAULT_HISTORY_INTERVAL)
+    return constants
+
+def strain_limits(constants, strain_count):
+    limits = [constants.get("_strainLimit({})".format(i), 0.0) for i in range(1, 11)]
+    # first limit depends on the driver (see _calc_variables of DSS_cyclic_drained.f2fis)
+    limits[0] = 0.01 if strain_count == 1 else 0.000003
+    return limits[:int(strain_count)]
+
+def existing_outputs(results_dir, basefile):
+    return [f for f in expected_outputs(basefile) if os.path.isfile(os.path.join(results_dir, f))]
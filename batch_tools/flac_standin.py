@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Local stand-in for FLAC2D: runs generated drivers and batch files without a license
+- a driver is 'run' by reading (with the files it calls, for thin drivers) its _var_inputs block (_Dr, _confinement, _static_bias, _Ko,
+  _nCycles, _strainCount, _csr_in1..5, _basefile) and the constants of the driver body
+  (_maxCycles, _maxStrInc, _strainLimit(i), ...)
+- it writes the same files as the _five_files and _summary FISH functions, with the same
+  headers and names (<basefile>_1.csv ... _5.csv and _csrN.csv or _MRD.csv) in the current
+  working folder, as FLAC does (one set per case for packed drivers)
+- values are synthetic but shaped like the real ones: undrained elements reach the
+  triggering criteria after N = 15*(CRR/CSR)^(1/0.3) cycles (0 in the summary when that is
+  beyond _maxCycles), drained elements follow a hyperbolic backbone with Masing loops whose
+  secant modulus and damping are those of the MRD summary, both shifted by 1% per 1e-5 of strain
+  increment per step (for convergence studies); they are meant for load tests of the
+  orchestration and post-processing, not for engineering use
+- batch files are followed line by line: 'program directory' changes the working folder
+  and 'program call' runs the driver (paths relative to the working folder)
+- 'model save' writes the named state file (a copy of the inputs) instead of csv files, and
+  'model restore' stops the driver when the state file is missing, as FLAC does; drivers with
+  checkpoints (_checkpoint_in) also write <basefile>_ckpt.sav and extend runs use _maxCycles_in
+- rows per element file, a delay per driver and a failure rate (FLAC's random 'bad
+  parameter' stop: nothing is written and the exit code is 1) can be set
+
+Usage: python flac_standin.py <driver or batch .f2fis> [--rows 2000] [--delay 0] [--failure-rate 0]
+"""
+import math
+import os
+import random
+import re
+import time
+
+from batch_files import expand_calls
+from flac_files  import (ELEMENT_HEADERS, N_ELEMENTS, SUMMARY_HEADERS, body_constants, checkpoint_file,
+                         drainage, element_file, pack_members, parse_var_inputs, state_files,
+                         strain_limits, summary_file, summary_tag)
+
+DEFAULT_ROWS = 2000
+B_SLOPE      = 0.3
+PA_KPA       = 101.3
+
+_PROGRAM = re.compile(r"^\s*program\s+(call|directory)\s+'([^']*)'", re.IGNORECASE)
+
+class BadParameter(Exception):
+    """Simulated FLAC stop ('bad parameter') of a driver"""
+
+class MissingState(Exception):
+    """Restored state file not found"""
+
+#------------------------------------------------------------
+def _fmt(value):
+    return "{:.6g}".format(value)
+
+def _write_csv(file_path, header, rows):
+    with open(file_path, "w") as f:
+        f.write(header + "\n")
+        for row in rows:
+            f.write(",".join(_fmt(v) for v in row) + "\n")
+
+# CSR of the 3rd element as in _input_variables (I&B 2008, Eqn 70)
+def csr_mid(Dr):
+    N160 = min(46.0, max(2.0, 46.0 * Dr ** 2))
+    return math.exp(N160 / 14.1 + (N160 / 126.0) ** 2 - (N160 / 23.6) ** 3 + (N160 / 25.4) ** 4 - 2.8)
+
+def element_csrs(params):
+    if params.get("_csr_in1", 0) > 0:
+        return [params["_csr_in{}".format(n)] for n in range(1, N_ELEMENTS + 1)]
+    mid = csr_mid(params["_Dr"])
+    return [mid / 1.6, mid / 1.3, mid, mid * 1.3, mid * 1.6]
+
+# Error of the strain increment per step (_maxStrInc, or _maxStrInc_in of ladders): +1% per 1e-5
+def discretisation(params, constants):
+    return 1.0 + 1000.0 * (params.get("_maxStrInc_in", 0) or constants.get("_maxStrInc", 1.0e-5))
+
+#------------------------------------------------------------
+# Undrained cyclic DSS: _five_files (Ncyc, CSR, strain, sigv) and _summary (csrN)
+def undrained_outputs(params, constants, rows):
+    max_cycles = params.get("_maxCycles_in", 0) or constants.get("_maxCycles", 100.0)
+    sig_vc     = params.get("_confinement", 1.0)
+    bias       = params.get("_static_bias", 0.0)
+    crr        = csr_mid(params["_Dr"]) * sig_vc ** -0.1 * (1.0 + 0.5 * bias) * ((1.0 + params.get("_Ko", 0.5)) / 1.5) ** 0.2
+    if params.get("_hpo", 0) > 0:           # sampled (see sampling.py)
+        crr *= (params["_hpo"] / 0.45) ** 0.5
+    crr *= discretisation(params, constants)
+
+    elements, summary = [], []
+    for csr in element_csrs(params):
+        n_liq  = 15.0 * (crr / csr) ** (1.0 / B_SLOPE)
+        n_crit = [n_liq * f for f in (1.0, 0.9, 1.1)]
+        liq    = [n + 0.5 if n <= max_cycles else 0.0 for n in n_crit]     # 0: not triggered
+        n_end  = min(n_crit[2] + 0.5, max_cycles)
+        hist   = []
+        for i in range(rows):
+            N     = n_end * i / max(rows - 1, 1)
+            ru    = min(0.99, (N / n_liq) ** 0.5)
+            gamma = 0.01 * math.exp(4.0 * min(N / n_liq, 1.0) - 4.0) * 3.0 * math.sin(2.0 * math.pi * N)
+            sigv  = 1.0 - ru
+            hist.append((N, csr * math.sin(2.0 * math.pi * N) + bias, 100.0 * (gamma + bias * 0.01),
+                         sig_vc * sigv, sigv, ru))
+        if n_crit[2] < max_cycles:          # loading of the element stops at _maxStrain
+            hist[-1] = hist[-1][:2] + (100.0 * constants.get("_maxStrain", 0.04),) + hist[-1][3:]
+        elements.append(hist)
+        summary.append((csr, liq[0], liq[1], liq[2]))
+    return elements, summary
+
+# Damping ratio of the Masing loops of a hyperbolic backbone at strain x = gamma/gamma_r
+def masing_damping(x):
+    return (4.0 / math.pi) * (1.0 + 1.0 / x) * (1.0 - math.log(1.0 + x) / x) - 2.0 / math.pi
+
+# Shear stresses along a strain path: hyperbolic backbone beyond the largest strain so far,
+# Masing branches (tau_r + 2*backbone((gamma - gamma_r)/2)) from the last reversal inside it
+def masing_stresses(path, gmax, gamma_r):
+    def backbone(gamma):
+        return gmax * gamma / (1.0 + abs(gamma) / gamma_r)
+    stresses, reversal, peak, last, rising = [], (0.0, 0.0), 0.0, 0.0, True
+    for gamma in path:
+        if gamma != last and (gamma > last) != rising:
+            reversal, rising = (last, stresses[-1] if stresses else 0.0), gamma > last
+        if abs(gamma) >= peak:
+            peak, tau = abs(gamma), backbone(gamma)
+        else:
+            tau = reversal[1] + 2.0 * backbone((gamma - reversal[0]) / 2.0)
+        stresses.append(tau)
+        last = gamma
+    return stresses
+
+# Drained strain controlled DSS: _five_files (strain, stress) and _summary (MRD)
+def drained_outputs(params, constants, rows):
+    n_cycles = int(params.get("_nCycles", 1))
+    limits   = strain_limits(constants, params.get("_strainCount", 1))
+    gmax     = 5.0e4 * (1.0 + 2.0 * params["_Dr"])                # kPa
+    gamma_r  = [0.0004 * (1.0 + 0.2 * n) * discretisation(params, constants) for n in range(N_ELEMENTS)]
+    sigv     = constants.get("_confinement", 1.0) * PA_KPA
+
+    summary = []
+    for limit in limits:
+        for _ in range(n_cycles):
+            row = [limit * 100.0]
+            for n in range(N_ELEMENTS):
+                ratio = 1.0 / (1.0 + limit / gamma_r[n])
+                damp  = 100.0 * masing_damping(limit / gamma_r[n])
+                row  += [gmax * ratio, ratio, damp]
+            summary.append(row)
+
+    elements = []
+    per_loop = max(rows // max(len(limits) * n_cycles, 1), 4)
+    steps    = [limit for limit in limits for _ in range(n_cycles * per_loop)]
+    path     = [limit * math.sin(2.0 * math.pi * i / per_loop) for i, limit in enumerate(steps)]
+    for n in range(N_ELEMENTS):
+        hist, eps_v = [], 0.0
+        for limit, gamma, tau in zip(steps, path, masing_stresses(path, gmax, gamma_r[n])):
+            eps_v += 0.05 * limit / per_loop
+            hist.append((100.0 * gamma, 100.0 * eps_v, tau, tau / sigv, sigv, 1.0))
+        elements.append(hist)
+    return elements, summary
+
+#------------------------------------------------------------
+# Runs one driver: writes its csv files in work_dir (default: current folder)
+def run_driver(driver_path, work_dir=None, rows=DEFAULT_ROWS, delay=0.0, failure_rate=0.0, rng=None):
+    rng = rng or random.Random()
+    work_dir  = work_dir or os.getcwd()
+    text      = expand_calls(driver_path, work_dir)
+    params    = parse_var_inputs(text)
+    constants = body_constants(text)
+    basefile  = params.get("_basefile")
+    if not basefile:
+        raise ValueError("no _basefile in the _var_inputs block of " + driver_path)
+
+    if failure_rate > 0 and rng.random() < failure_rate:
+        raise BadParameter("bad parameter in " + os.path.basename(driver_path))
+
+    states = state_files(text)
+    if "restore" in states and not os.path.isfile(os.path.join(work_dir, states["restore"])):
+        raise MissingState("cannot restore " + states["restore"])
+
+    if delay > 0:
+        time.sleep(delay)
+    if "save" in states:
+        with open(os.path.join(work_dir, states["save"]), "w") as f:
+            f.write("\n".join("{} = {}".format(k, v) for k, v in sorted(params.items())) + "\n")
+        return basefile
+    for member in pack_members(params):
+        name = member["_basefile"]
+        if drainage(name) == "u":
+            elements, summary = undrained_outputs(member, constants, rows)
+        else:
+            elements, summary = drained_outputs(member, constants, rows)
+        for n, hist in enumerate(elements, 1):
+            _write_csv(os.path.join(work_dir, element_file(name, n)), ELEMENT_HEADERS[drainage(name)], hist)
+        _write_csv(os.path.join(work_dir, summary_file(name)), SUMMARY_HEADERS[summary_tag(name)], summary)
+        if params.get("_checkpoint_in", 0) > 0:
+            with open(os.path.join(work_dir, checkpoint_file(name)), "w") as f:
+                f.write("_maxCycles = {}\n".format(params.get("_maxCycles_in", 0) or constants.get("_maxCycles")))
+    return basefile
+
+# Runs a batch file (or a single driver); returns the number of drivers that stopped
+def run_file(file_path, rows=DEFAULT_ROWS, delay=0.0, failure_rate=0.0, seed=None):
+    rng = random.Random(seed)
+    with open(file_path, "r") as f:
+        text = f.read()
+    if "fish def _var_inputs" in text:
+        calls = [("call", file_path)]
+        work_dir = os.getcwd()
+    else:
+        calls = [m.groups() for m in map(_PROGRAM.match, text.splitlines()) if m]
+        work_dir = os.path.dirname(os.path.abspath(file_path))
+
+    failed = 0
+    for command, path in calls:
+        path = os.path.join(work_dir, path)
+        if command.lower() == "directory":
+            work_dir = os.path.normpath(path)
+            os.makedirs(work_dir, exist_ok=True)
+            continue
+        try:
+            basefile = run_driver(path, work_dir, rows, delay, failure_rate, rng)
+            print("  {}: done".format(basefile))
+        except (BadParameter, MissingState) as error:
+            failed += 1
+            print("  *** " + str(error))
+    return failed
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description="Run FLAC drivers or batch files with synthetic results")
+    parser.add_argument("file", help="driver or batch .f2fis file")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="rows per element csv file")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds per driver")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability of a 'bad parameter' stop")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    sys.exit(1 if run_file(args.file, args.rows, args.delay, args.failure_rate, args.seed) else 0)
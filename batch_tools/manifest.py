@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Content-hash manifest for incremental driver regeneration
+- one manifest per batch file (<batch name>_manifest.json, next to the drivers) keeps,
+  for every driver (keyed by its file name without .f2fis, the basefile of the run except
+  for extend runs, <basefile>_ext): the _var_inputs parameters, the template and body hashes it was
+  built from and the hash of the complete driver text
+- on a new run a driver is written only when its text hash differs from the manifest
+  (or the file is missing), so unchanged drivers keep their mtime
+- drivers are reported as added, changed, unchanged or obsolete (in the previous
+  manifest but no longer part of the sweep); obsolete files are left on disk
+"""
+import hashlib
+import json
+import os
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def manifest_path(out_dir, batch_file):
+    return os.path.join(out_dir, os.path.splitext(batch_file)[0] + "_manifest.json")
+
+#------------------------------------------------------------
+class Manifest:
+    def __init__(self, path, template_text, body_text):
+        self.path          = path
+        self.template_hash = text_hash(template_text)
+        self.body_hash     = text_hash(body_text)
+        self.drivers       = {}
+        self.status        = {"added": [], "changed": [], "unchanged": [], "obsolete": []}
+
+        self.previous = {"drivers": {}}
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                self.previous = json.load(f)
+
+    # Returns True if the driver text has to be written to driver_path (name: driver file name
+    # without .f2fis, the key of the manifest and of the delta batch)
+    def needs_write(self, name, driver_path, text, params):
+        output_hash = text_hash(text)
+        self.drivers[name] = {"driver":        os.path.basename(driver_path),
+                              "params":        params,
+                              "template_hash": self.template_hash,
+                              "body_hash":     self.body_hash,
+                              "output_hash":   output_hash}
+
+        old = self.previous["drivers"].get(name)
+        if old is None:
+            # not in the manifest, but an identical driver may already be on disk
+            if os.path.isfile(driver_path) and os.path.getsize(driver_path) == len(text.encode("utf-8")):
+                with open(driver_path, "r") as f:
+                    if f.read() == text:
+                        self.status["unchanged"].append(name)
+                        return False
+            self.status["added"].append(name)
+            return True
+        # thin drivers keep their text when the template or body change, their results do not
+        if (old["output_hash"] != output_hash or old["template_hash"] != self.template_hash or
+                old["body_hash"] != self.body_hash or not os.path.isfile(driver_path)):
+            self.status["changed"].append(name)
+            return True
+        self.status["unchanged"].append(name)
+        return False
+
+    def delta(self):
+        return self.status["added"] + self.status["changed"]
+
+    def save(self):
+        self.status["obsolete"] = [b for b in self.previous["drivers"] if b not in self.drivers]
+        content = {"template_hash": self.template_hash,
+                   "body_hash":     self.body_hash,
+                   "drivers":       self.drivers}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(content, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def report(self, max_listed=20):
+        if self.previous.get("template_hash", self.template_hash) != self.template_hash:
+            print("Template changed since last generation")
+        if self.previous.get("body_hash", self.body_hash) != self.body_hash:
+            print("Driver body changed since last generation")
+        print("added: {}, changed: {}, unchanged: {}, obsolete: {}".format(
+              *[len(self.status[key]) for key in ["added", "changed", "unchanged", "obsolete"]]))
+        for key in ["added", "changed", "obsolete"]:
+            for basefile in self.status[key][:max_listed]:
+                print("  {:9s} {}".format(key, basefile))
+            if len(self.status[key]) > max_listed:
+                print("  {:9s} ... and {} more".format(key, len(self.status[key]) - max_listed))
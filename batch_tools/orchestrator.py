@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Unattended runs of a batch of drivers through a FLAC console command
+- the drivers are the 'program call' lines of a batch file (any of the batch, delta,
+  resume or shard files written by the generators), run in that order by a bounded
+  pool of workers (one per core or per license, whichever is smaller)
+- the command is a template with {driver} in place of the driver file name, e.g.
+    "C:/Program Files/Itasca/FLAC2D900/exe64/flac2d_console.exe call {driver}"
+  given with --command or the FLAC_COMMAND environment variable; the stand-in of
+  flac_standin.py (synthetic csv files, for tests without a license) only runs when asked
+  for with --standin, so a run without a command stops instead of filling results/ with
+  files that resume, adaptive CSRs, extend runs and the design charts would take as FLAC's
+- every job runs in its own working folder (work/<basefile>/) holding a copy of the
+  driver and of the files it calls, so parallel jobs never share FLAC's output files;
+  the console output is kept in work/<basefile>/console.log
+- a job fails when the command times out, exits with an error or leaves incomplete
+  csv files (see resume.py); the spurious 'bad parameter' stop of FLAC is retried
+- the csv files of a successful job are moved into results/ with os.replace, element
+  files first and the summary file last (for every case of a packed driver), so a summary
+  file in results/ always means a complete case; the working folder is then removed (failed ones are kept)
+- warm started drivers (see the *_graph.json files of the driver folder) wait for their
+  state driver, and are skipped when it failed; saved states are moved into results/ and
+  the file named in the 'model restore' line of a driver is copied into its job folder
+- the checkpoint of a driver (<basefile>_ckpt.sav) is moved into results/ too, from where
+  extend runs (see extend.py) restore it
+- one line per job is appended to results/run_log.csv (status, attempts, wall time),
+  which the cost model reads for its timed observations; a job that raises (e.g. os.replace
+  on a locked file) is logged with status 'error' and its message, and the batch goes on;
+  extend runs log the basefile they extend, and their times are read under the driver name
+"""
+import csv
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import (FIRST_COMPLETED, ThreadPoolExecutor, wait)
+
+from batch_files import (called_files, read_graphs)
+from flac_files  import (checkpoint_file, expected_outputs, pack_members, read_var_inputs,
+                         state_files)
+from resume      import check_driver_outputs
+
+RUN_LOG        = "run_log.csv"
+RUN_LOG_FIELDS = ["basefile", "driver", "status", "attempts", "seconds", "returncode", "finished", "message"]
+
+RETRY_MESSAGES = ["bad parameter"]
+
+COMMAND_VARIABLE = "FLAC_COMMAND"
+STANDIN_COMMAND  = '"{}" "{}" {{driver}}'.format(sys.executable,
+                                                os.path.join(os.path.dirname(os.path.abspath(__file__)), "flac_standin.py"))
+
+#------------------------------------------------------------
+def split_command(command, driver):
+    return shlex.split(command.format(driver=driver), posix=(os.name != "nt"))
+
+# Copies the driver and (recursively) the files it calls into job_dir, and the files of
+# restored_files (absolute paths) next to it
+def stage_job(out_dir, driver_file, job_dir, restored_files=()):
+    if os.path.isdir(job_dir):
+        shutil.rmtree(job_dir)
+    os.makedirs(job_dir)
+    pending, staged = [driver_file], set()
+    while pending:
+        file = pending.pop()
+        if file in staged:
+            continue
+        staged.add(file)
+        source = os.path.join(out_dir, file)
+        target = os.path.join(job_dir, file)
+        os.makedirs(os.path.dirname(target) or job_dir, exist_ok=True)
+        shutil.copyfile(source, target)
+        if file.endswith((".f2fis", ".fis", ".dat")):
+            pending += [f for f in called_files(source) if os.path.isfile(os.path.join(out_dir, f))]
+    for source in restored_files:
+        shutil.copyfile(source, os.path.join(job_dir, os.path.basename(source)))
+
+# Moves the outputs of a finished job into results_dir, summary file last (its checkpoint,
+# if any, before them)
+def collect_outputs(job_dir, results_dir, basefile):
+    files = expected_outputs(basefile)
+    if os.path.isfile(os.path.join(job_dir, checkpoint_file(basefile))):
+        files = [checkpoint_file(basefile)] + files
+    for file in files:
+        os.replace(os.path.join(job_dir, file), os.path.join(results_dir, file))
+
+#------------------------------------------------------------
+class Orchestrator:
+    def __init__(self, out_dir, command=None, workers=None, timeout=None,
+                 retries=2, results_dir=None, work_dir=None, licenses=None):
+        command = command or os.environ.get(COMMAND_VARIABLE)
+        if not command:
+            raise ValueError("no FLAC command: give one (or STANDIN_COMMAND for the stand-in) or set {}".format(
+                             COMMAND_VARIABLE))
+        self.out_dir     = out_dir
+        self.command     = command
+        self.workers     = min(workers or os.cpu_count() or 1, licenses or float("inf"))
+        self.timeout     = timeout
+        self.retries     = retries
+        self.results_dir = results_dir or os.path.join(out_dir, "results")
+        self.work_dir    = work_dir or os.path.join(out_dir, "work")
+        self._log_lock   = threading.Lock()
+        self.saves, self.depends = read_graphs(out_dir)
+        os.makedirs(self.results_dir, exist_ok=True)
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def _log(self, row):
+        log_path = os.path.join(self.results_dir, RUN_LOG)
+        with self._log_lock:
+            new = not os.path.isfile(log_path)
+            with open(log_path, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=RUN_LOG_FIELDS)
+                if new:
+                    writer.writeheader()
+                writer.writerow(row)
+
+    def _finish(self, basefile, driver_file, status, attempts, start, returncode=None, message=""):
+        self._log({"basefile": basefile, "driver": driver_file, "status": status, "attempts": attempts,
+                   "seconds": round(time.time() - start, 3), "returncode": returncode,
+                   "finished": time.strftime("%Y-%m-%d %H:%M:%S"), "message": message})
+        print("  {}: {}{}".format(basefile, status, " after {} attempts".format(attempts) if attempts > 1 else ""))
+        return status
+
+    # One attempt: returns (status, returncode, console output)
+    def _attempt(self, driver_file, job_dir, params):
+        try:
+            done = subprocess.run(split_command(self.command, driver_file), cwd=job_dir,
+                                  stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  timeout=self.timeout)
+        except subprocess.TimeoutExpired as error:
+            return "timeout", None, (error.output or b"").decode("utf-8", "replace")
+        output = done.stdout.decode("utf-8", "replace")
+        if any(message in output.lower() for message in RETRY_MESSAGES):
+            return "bad parameter", done.returncode, output
+        if done.returncode != 0:
+            return "error", done.returncode, output
+        if driver_file in self.saves:
+            saved = os.path.isfile(os.path.join(job_dir, self.saves[driver_file]))
+            return ("done" if saved else "incomplete"), done.returncode, output
+        for member in pack_members(params):
+            if check_driver_outputs(job_dir, member["_basefile"], member):
+                return "incomplete", done.returncode, output
+        return "done", done.returncode, output
+
+    def run_driver(self, driver_file):
+        params   = read_var_inputs(os.path.join(self.out_dir, driver_file))
+        basefile = params["_basefile"]
+        job_dir  = os.path.join(self.work_dir, basefile)
+
+        start = time.time()
+        with open(os.path.join(self.out_dir, driver_file), "r") as f:
+            restore = state_files(f.read()).get("restore")
+        restored = [os.path.join(self.results_dir, restore)] if restore else []
+        if restored and not os.path.isfile(restored[0]):
+            return self._finish(basefile, driver_file, "no state", 0, start)
+        for attempt in range(1, self.retries + 2):
+            stage_job(self.out_dir, driver_file, job_dir, restored)
+            status, returncode, output = self._attempt(driver_file, job_dir, params)
+            with open(os.path.join(job_dir, "console.log"), "w") as f:
+                f.write(output)
+            if status != "bad parameter":
+                break
+
+        if status == "done":
+            if driver_file in self.saves:
+                os.replace(os.path.join(job_dir, self.saves[driver_file]),
+                           os.path.join(self.results_dir, self.saves[driver_file]))
+            else:
+                for member in pack_members(params):
+                    collect_outputs(job_dir, self.results_dir, member["_basefile"])
+            shutil.rmtree(job_dir, ignore_errors=True)
+        return self._finish(basefile, driver_file, status, attempt, start, returncode)
+
+    # Runs all drivers called by batch_file; returns {status: count}
+    # - a driver whose state driver is in the batch is submitted once that one finished
+    def run_batch(self, batch_file):
+        driver_files = called_files(os.path.join(self.out_dir, batch_file))
+        print("{} drivers of {} on {} workers".format(len(driver_files), batch_file, self.workers))
+        in_batch  = set(driver_files)
+        waits_for = {f: self.depends[f] for f in driver_files if self.depends.get(f) in in_batch}
+        followers = {}
+        for driver_file, state_driver in waits_for.items():
+            followers.setdefault(state_driver, []).append(driver_file)
+
+        statuses, running = {}, {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            def release(files):
+                for driver_file in files:
+                    state_driver = waits_for.get(driver_file)
+                    if state_driver is None or statuses.get(state_driver) == "done":
+                        running[pool.submit(self.run_driver, driver_file)] = (driver_file, time.time())
+                    elif state_driver in statuses:
+                        params = read_var_inputs(os.path.join(self.out_dir, driver_file))
+                        statuses[driver_file] = self._finish(params["_basefile"], driver_file, "skipped", 0, time.time())
+            release([f for f in driver_files if f not in waits_for])
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    driver_file, start = running.pop(future)
+                    try:
+                        statuses[driver_file] = future.result()
+                    except Exception as error:
+                        print("[ERROR] {}: {}".format(driver_file, error))
+                        statuses[driver_file] = self._finish(os.path.splitext(driver_file)[0], driver_file,
+                                                             "error", 1, start, message=str(error))
+                    release(followers.get(driver_file, []))
+        statuses = list(statuses.values())
+        counts = {status: statuses.count(status) for status in sorted(set(statuses))}
+        print(", ".join("{}: {}".format(status, n) for status, n in counts.items()))
+        return counts
+
+#------------------------------------------------------------
+# Wall time of the drivers that finished, {driver name without .f2fis: seconds}
+# - the driver name is the basefile of the run, except for extend runs (<basefile>_ext, see
+#   extend.py), whose time must not replace the one of the run they extend
+def read_run_log(results_dir):
+    log_path = os.path.join(results_dir, RUN_LOG)
+    seconds  = {}
+    if os.path.isfile(log_path):
+        with open(log_path, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                if row["status"] == "done":
+                    seconds[os.path.splitext(row["driver"])[0]] = float(row["seconds"])
+    return seconds
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the drivers of a batch file in parallel FLAC processes")
+    parser.add_argument("batch", help="batch file (its folder holds the drivers)")
+    parser.add_argument("--command", default=os.environ.get(COMMAND_VARIABLE),
+                        help="console command with {{driver}} for the driver file (default: ${})".format(COMMAND_VARIABLE))
+    parser.add_argument("--standin", action="store_true", help="run the FLAC stand-in (synthetic results, tests only)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel jobs (default: number of cores)")
+    parser.add_argument("--licenses", type=int, default=None, help="FLAC licenses, caps the workers (default: no cap)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per driver")
+    parser.add_argument("--retries", type=int, default=2, help="retries after a 'bad parameter' stop")
+    args = parser.parse_args()
+    if not (args.standin or args.command):
+        parser.error("give the FLAC command with --command (or ${}), or --standin for the stand-in".format(
+                     COMMAND_VARIABLE))
+    out_dir = os.path.dirname(os.path.abspath(args.batch))
+    counts  = Orchestrator(out_dir, STANDIN_COMMAND if args.standin else args.command, args.workers, args.timeout, args.retries,
+                           licenses=args.licenses).run_batch(
+              os.path.basename(args.batch))
+    sys.exit(0 if set(counts) <= {"done"} else 1)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Resume mode: find drivers without complete results after an interrupted batch
+- every driver is expected to leave five element files and one summary file in results/
+  (<basefile>_1.csv ... _5.csv and _csrN.csv or _MRD.csv)
+- a file is flagged when it is missing, when its header is not the one written by the
+  driver body, when it has no data rows, or when its last line is truncated (wrong number
+  of fields or a non-numeric entry)
+- summary files must also have the expected number of rows: 5 CSRs for _csrN.csv and
+  _nCycles * _strainCount for _MRD.csv
+- only the header and the tail of the (large) element files are read
+"""
+import os
+
+from flac_files import (ELEMENT_HEADERS, N_ELEMENTS, SUMMARY_HEADERS, count_rows, drainage,
+                        element_file, head_and_tail, summary_file, summary_tag)
+from sweep      import case_inputs
+
+#------------------------------------------------------------
+def _numeric_fields(line, n_fields):
+    fields = line.split(",")
+    if len(fields) != n_fields:
+        return False
+    try:
+        [float(field) for field in fields]
+    except ValueError:
+        return False
+    return True
+
+# Problems found in one csv file (empty list when the file looks complete)
+def check_file(file_path, header, expected_rows=None):
+    if not os.path.isfile(file_path):
+        return ["missing"]
+    found_header, last_line = head_and_tail(file_path)
+    if found_header != header:
+        return ["unexpected header"]
+    if last_line == found_header:
+        return ["no data rows"]
+    if not _numeric_fields(last_line, len(header.split(","))):
+        return ["truncated last line"]
+    if expected_rows is not None:
+        rows = count_rows(file_path)
+        if rows != expected_rows:
+            return ["{} rows instead of {}".format(rows, expected_rows)]
+    return []
+
+def expected_summary_rows(basefile, params):
+    if summary_tag(basefile) == "csrN":
+        return N_ELEMENTS
+    return int(params.get("_nCycles", 1)) * int(params.get("_strainCount", 1))
+
+# {file name: problems} for all outputs of one driver
+def check_driver_outputs(results_dir, basefile, params):
+    problems = {}
+    for n in range(1, N_ELEMENTS + 1):
+        file = element_file(basefile, n)
+        found = check_file(os.path.join(results_dir, file), ELEMENT_HEADERS[drainage(basefile)])
+        if found:
+            problems[file] = found
+    file  = summary_file(basefile)
+    found = check_file(os.path.join(results_dir, file), SUMMARY_HEADERS[summary_tag(basefile)],
+                       expected_summary_rows(basefile, params))
+    if found:
+        problems[file] = found
+    return problems
+
+#------------------------------------------------------------
+# Yields only the cases whose results are missing or broken, reporting why
+def incomplete_cases(spec, cases, results_dir):
+    n_checked, n_incomplete = 0, 0
+    for case in cases:
+        n_checked += 1
+        problems = check_driver_outputs(results_dir, case["basefile"], dict(case_inputs(spec, case)))
+        if problems:
+            n_incomplete += 1
+            missing = sum(1 for p in problems.values() if p == ["missing"])
+            broken  = ["{} ({})".format(f, p[0]) for f, p in problems.items() if p != ["missing"]]
+            print("  {}: {} missing{}".format(case["basefile"], missing,
+                                              ", broken: " + "; ".join(broken) if broken else ""))
+            yield case
+    print("{} of {} drivers without complete results".format(n_incomplete, n_checked))
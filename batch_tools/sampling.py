@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Space-filling sampling of PM4Sand secondary parameters (_hpo, _nb, _nd, _Ado, _zmax, _cz,
+_ce, _CDR, _Ckaf, _Q, _R, _Gdegr, ...) and sensitivity of the results to them
+- a study file (JSON, next to the sweep spec) holds:
+    method     : "lhs" (Latin hypercube) or "sobol" (scrambled, n rounded up to a power of 2)
+    samples    : number of samples
+    seed       : random seed of the design
+    parameters : {fish variable: [low, high]} of the sampled parameters
+    log_scale  : fish variables sampled uniformly in log space
+    axes       : values of the sweep axes the design is crossed with (defaults to the spec axes;
+                 keep it small, e.g. a single Dr for which _hpo is calibrated)
+    batch_file : batch file of the study drivers
+- sampled values reach the driver through the _var_overrides function (see sweep.py),
+  which the bodies call after their hard-coded secondary parameters; samples carry the
+  tag _s0001, _s0002, ... after Dr so decode_name still works
+- the design is written to <batch file>_design.csv (basefile, sample, axes, parameters)
+- sensitivity: for a scalar response of every sample (CRR15 from _csrN.csv for undrained,
+  G/Gmax or damping of element 3 at a given strain from _MRD.csv for drained) two indices
+  are computed per parameter:
+    SRRC : standardized rank regression coefficient (sign and strength of a monotonic effect)
+    S1   : binned first-order index Var(E[Y|Xi]) / Var(Y), with sqrt(n) equal-count bins of Xi
+           (corrected for the (bins-1)/(n-1) it takes on average for a parameter without effect)
+  and written to <batch file>_sensitivity.csv
+"""
+import csv
+import json
+import math
+import os
+
+import numpy as np
+from scipy.stats import qmc, rankdata
+
+from adaptive_csr import (assess, read_csrN)
+from flac_files   import (body_constants, drainage, summary_file)
+from sweep        import iter_cases
+
+METHODS = ("lhs", "sobol")
+
+#------------------------------------------------------------
+def load_study(study_file):
+    with open(study_file, "r") as f:
+        study = json.load(f)
+    if study.get("method", "lhs") not in METHODS:
+        raise ValueError("unknown sampling method '{}', use one of {}".format(study["method"], METHODS))
+    return study
+
+def sample_tag(k):
+    return "_s{:04d}".format(k)
+
+# Unit hypercube design, n x d
+def unit_design(method, n, d, seed=None):
+    if method == "sobol":
+        m = max(int(math.ceil(math.log2(n))), 0)
+        return qmc.Sobol(d, scramble=True, seed=seed).random_base2(m)
+    return qmc.LatinHypercube(d, seed=seed).random(n)
+
+# Design in parameter space: (names, n x d array)
+def design(study):
+    names  = list(study["parameters"])
+    bounds = np.array([study["parameters"][name] for name in names], dtype=float)
+    logs   = np.array([name in study.get("log_scale", []) for name in names])
+    low    = np.where(logs, np.log(bounds[:, 0]), bounds[:, 0])
+    high   = np.where(logs, np.log(bounds[:, 1]), bounds[:, 1])
+    unit   = unit_design(study.get("method", "lhs"), study["samples"], len(names), study.get("seed"))
+    values = qmc.scale(unit, low, high)
+    values[:, logs] = np.exp(values[:, logs])
+    return names, values
+
+def design_path(spec, study):
+    return os.path.join(spec["out_dir"], os.path.splitext(study["batch_file"])[0] + "_design.csv")
+
+#------------------------------------------------------------
+# Spec and cases of a study: every sample crossed with the study axes
+# - returns (spec for the study sweep, list of cases) and writes the design csv file
+def plan_study(spec, study):
+    names, values = design(study)
+    study_spec = dict(spec)
+    study_spec["overrides"] = spec.get("overrides", []) + [[name, name] for name in names]
+
+    axes  = dict(spec["axes"], **study.get("axes", {}))
+    cases = []
+    for base in iter_cases(spec, axes):
+        for k, row in enumerate(values, 1):
+            case = dict(base, tag=sample_tag(k), **{name: float("{:.5g}".format(v)) for name, v in zip(names, row)})
+            case["basefile"] = spec["name"].format(**case)
+            cases.append(case)
+
+    with open(design_path(spec, study), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["basefile", "sample"] + list(axes) + names)
+        for case in cases:
+            writer.writerow([case["basefile"], case["tag"][2:]] + [case[a] for a in axes] + [case[n] for n in names])
+    print("{} design: {} samples x {} parameters x {} axes cases -> {}".format(
+          study.get("method", "lhs"), len(values), len(names), len(cases) // len(values), design_path(spec, study)))
+    return study_spec, cases
+
+#------------------------------------------------------------
+# Scalar responses read from the results of one driver (None when missing)
+def crr15(results_dir, basefile, criterion="Ncyc_to_3%_strain", max_cycles=100.0):
+    file = os.path.join(results_dir, summary_file(basefile))
+    if not os.path.isfile(file):
+        return None
+    return assess(read_csrN(file), criterion, max_cycles)[1]
+
+def mrd_value(results_dir, basefile, column="G/Gmax3", strain_pct=0.1):
+    file = os.path.join(results_dir, summary_file(basefile))
+    if not os.path.isfile(file):
+        return None
+    with open(file, "r", newline="") as f:
+        rows = [{k: float(v) for k, v in row.items()} for row in csv.DictReader(f)]
+    strains = [r["eps_xy(%)"] for r in rows]
+    if not strains or not min(strains) <= strain_pct <= max(strains):
+        return None
+    order = np.argsort(strains)
+    return float(np.interp(math.log(strain_pct), np.log(np.array(strains)[order]),
+                           np.array([r[column] for r in rows])[order]))
+
+#------------------------------------------------------------
+def srrc(X, y):
+    R  = np.column_stack([rankdata(x) for x in X.T])
+    ry = rankdata(y)
+    R  = (R - R.mean(axis=0)) / R.std(axis=0)
+    ry = (ry - ry.mean()) / ry.std()
+    coef, *_ = np.linalg.lstsq(np.column_stack([np.ones(len(ry)), R]), ry, rcond=None)
+    return coef[1:]
+
+def binned_first_order(X, y, n_bins=None):
+    n_bins = n_bins or max(2, int(round(math.sqrt(len(y)))))
+    var_y  = y.var()
+    bias   = (n_bins - 1.0) / (len(y) - 1.0)      # expected value for a parameter without effect
+    S1 = []
+    for x in X.T:
+        bins  = np.array_split(np.argsort(x), n_bins)
+        means = np.array([y[b].mean() for b in bins])
+        sizes = np.array([len(b) for b in bins])
+        eta2  = float(np.sum(sizes * (means - y.mean()) ** 2) / len(y) / var_y) if var_y > 0 else 0.0
+        S1.append(max(0.0, (eta2 - bias) / (1.0 - bias)))
+    return np.array(S1)
+
+# Sensitivity indices of a response to the sampled parameters of a study
+def sensitivity(spec, study, results_dir=None, response=None):
+    results_dir = results_dir or os.path.join(spec["out_dir"], "results")
+    if response is None:
+        with open(spec["body"], "r") as f:
+            max_cycles = body_constants(f.read()).get("_maxCycles", 100.0)
+        response = lambda basefile: (crr15(results_dir, basefile, max_cycles=max_cycles)
+                                     if drainage(basefile) == "u" else mrd_value(results_dir, basefile))
+
+    names = list(study["parameters"])
+    X, y  = [], []
+    with open(design_path(spec, study), "r", newline="") as f:
+        for row in csv.DictReader(f):
+            value = response(row["basefile"])
+            if value is not None and np.isfinite(value):
+                X.append([float(row[name]) for name in names])
+                y.append(value)
+    if len(y) < len(names) + 2:
+        raise ValueError("only {} samples with results, not enough for {} parameters".format(len(y), len(names)))
+    X, y = np.array(X), np.array(y)
+    if np.ptp(y) == 0:
+        raise ValueError("the response is the same for all {} samples".format(len(y)))
+
+    indices  = list(zip(names, srrc(X, y), binned_first_order(X, y)))
+    indices.sort(key=lambda t: -abs(t[1]))
+    out_path = os.path.join(spec["out_dir"], os.path.splitext(study["batch_file"])[0] + "_sensitivity.csv")
+    with open(out_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["parameter", "SRRC", "S1"])
+        for name, r, s in indices:
+            writer.writerow([name, "{:.4f}".format(r), "{:.4f}".format(s)])
+    print("Sensitivity of {} samples with results -> {}".format(len(y), out_path))
+    for name, r, s in indices:
+        print("  {:8s} SRRC {:+.3f}  S1 {:.3f}".format(name, r, s))
+    return indices
+
+if __name__ == "__main__":
+    import argparse
+    from sweep import load_spec
+    parser = argparse.ArgumentParser(description="Sensitivity indices of a sampling study from its results")
+    parser.add_argument("spec", help="JSON sweep spec file")
+    parser.add_argument("study", help="JSON study file")
+    parser.add_argument("--results", default=None, help="results folder (default: results/ next to the drivers)")
+    args = parser.parse_args()
+    sensitivity(load_spec(args.spec), load_study(args.study), args.results)
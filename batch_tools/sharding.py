@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Sharded batch files for running several FLAC instances in parallel
+- the list of 'program call' lines of a sweep is split into N balanced batch files named
+  after the serial one, e.g. batch_undrainedDSS_cyc_shard03of08.f2fis
+- each shard works in its own subfolder (shard03of08/) so that the csv files written by
+  parallel FLAC instances never overwrite each other: the shard batch file first moves
+  FLAC into that folder with 'program directory' and then calls the drivers one level up
+- balancing is greedy longest-processing-time: drivers are taken from the most to the
+  least expensive and each one goes to the least loaded shard (without costs all drivers
+  weigh the same and shards differ by at most one driver)
+- warm started drivers are balanced in groups (a state driver and the drivers restoring it),
+  so that every shard saves the states its drivers restore in its own folder
+- collect_shard_results moves the csv files of all shard folders into results/, with the
+  models they saved (the <basefile>_ckpt.sav checkpoints restored by extend runs and the
+  warm start states)
+"""
+import glob
+import os
+import shutil
+
+from batch_files import write_batch
+
+def shard_tag(i, n_shards):
+    width = max(2, len(str(n_shards)))
+    return "shard{:0{w}d}of{:0{w}d}".format(i + 1, n_shards, w=width)
+
+def shard_batch_file(batch_file, i, n_shards):
+    stem, ext = os.path.splitext(batch_file)
+    return stem + "_" + shard_tag(i, n_shards) + ext
+
+#------------------------------------------------------------
+# Splits items into n_shards lists of (about) equal total cost
+def balance(items, n_shards, costs=None):
+    if costs is None:
+        costs = [1.0] * len(items)
+    order  = sorted(range(len(items)), key=lambda k: -costs[k])
+    shards = [[] for _ in range(n_shards)]
+    loads  = [0.0] * n_shards
+    for k in order:
+        i = loads.index(min(loads))
+        shards[i].append(items[k])
+        loads[i] += costs[k]
+    return shards, loads
+
+#------------------------------------------------------------
+# Writes one batch file and one working folder per shard
+# - driver_files are relative to out_dir
+# - shared_files (called by thin drivers, relative to out_dir) are copied into every
+#   shard folder, since FLAC resolves 'program call' paths from its working folder
+# - groups ({driver file: group}) keeps the drivers of a group in one shard, in the order
+#   of driver_files
+# - returns the list of shard batch file paths
+def write_shards(out_dir, batch_file, driver_files, n_shards, costs=None, shared_files=(), groups=None):
+    if groups is None:
+        shards, loads = balance(list(driver_files), n_shards, costs)
+    else:
+        totals = {}
+        for k, driver_file in enumerate(driver_files):
+            group = groups[driver_file]
+            totals[group] = totals.get(group, 0.0) + (costs[k] if costs is not None else 1.0)
+        units, loads = balance(list(totals), n_shards, list(totals.values()))
+        shard_of = {group: i for i, unit in enumerate(units) for group in unit}
+        shards   = [[f for f in driver_files if shard_of[groups[f]] == i] for i in range(n_shards)]
+
+    batch_paths = []
+    for i, shard in enumerate(shards):
+        tag = shard_tag(i, n_shards)
+        os.makedirs(os.path.join(out_dir, tag), exist_ok=True)
+        for shared in shared_files:
+            shutil.copyfile(os.path.join(out_dir, shared), os.path.join(out_dir, tag, os.path.basename(shared)))
+
+        batch_path = os.path.join(out_dir, shard_batch_file(batch_file, i, n_shards))
+        write_batch(batch_path, ["../" + driver_file for driver_file in shard],
+                    preamble="program directory '" + tag + "'\n")
+        batch_paths.append(batch_path)
+        print("  {}: {} drivers, load {:.1f}".format(os.path.basename(batch_path), len(shard), loads[i]))
+    return batch_paths
+
+#------------------------------------------------------------
+# Moves the saved models and csv results of every shard working folder into results_dir
+def collect_shard_results(out_dir, results_dir=None):
+    results_dir = results_dir or os.path.join(out_dir, "results")
+    os.makedirs(results_dir, exist_ok=True)
+    moved = 0
+    for pattern in ("*.sav", "*.csv"):
+        for file in glob.glob(os.path.join(out_dir, "shard*of*", pattern)):
+            os.replace(file, os.path.join(results_dir, os.path.basename(file)))
+            moved += 1
+    print("{} result files moved to {}".format(moved, results_dir))
+    return moved
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Move the csv and saved model files of all shard folders into results/")
+    parser.add_argument("folder", help="driver folder holding the shardXXofNN working folders")
+    args = parser.parse_args()
+    collect_shard_results(args.folder)
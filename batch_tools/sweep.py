@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Sweep engine shared by the PM4Sand2D driver generators
+- a sweep is described by a JSON spec file that sits next to the driver body
+  (e.g. PM4Sand2D_Cyclic_DSS_undrained_batch/sweep_uDSS_cyc.json) and holds:
+    template / body : header template and FLAC driver body file names
+    batch_file      : name of the batch file that calls all produced drivers
+    constants       : fixed values available to all expressions (TestName, Soil, ...)
+    axes            : arrays of values to be varied (full-factorial product, in order)
+    derived         : python expressions evaluated per case (e.g. FirstCallFlag)
+    name            : naming rule, a format string over constants/axes/derived values
+                      ({tag} is an empty constant that follow-up and study sweeps replace
+                      by a token such as _r1, placed where decode_name ignores it)
+    inputs          : [fish variable, expression] pairs written in the _var_inputs block
+    overrides       : optional [fish variable, expression] pairs written in the _var_overrides
+                      function, which the driver bodies call at the end of the secondary
+                      parameter block of _input_variables (used by sampling.py)
+    name_width      : column at which the '=' of the _var_inputs block is aligned
+    pack            : optional packing of several cases into one driver (one FLAC model):
+                      axis (cases differing only along it are packed), size (cases per
+                      driver), body (packed driver body), sections (packed sections of the
+                      body, from which the packed body is written, see packed_body), name
+                      (naming rule of the packed driver, with {pack_first} and {pack_last}
+                      values of the axis) and inputs ([fish array, expression] pairs, one
+                      entry per packed case)
+    warm_start      : optional split of the drivers into state drivers, which run the body up
+                      to its STATE_MARKER line and save the model once per initial state, and
+                      drivers that restore that state and run the rest of the body: name
+                      (naming rule of the state drivers, whose values set the initial state)
+                      and inputs ([fish variable, expression] pairs of the state drivers)
+- template and body are read once per sweep; drivers are streamed to disk one at a
+  time and only their names are kept for the batch file (written through a single
+  buffered handle), so memory stays flat regardless of the size of the grid
+- optional content-hash manifest (manifest.py) for incremental regeneration
+- optional sharded batch files (sharding.py) for running several FLAC instances in parallel
+- optional runtime cost model (cost_model.py) for longest-job-first ordering and shard balancing
+- optional thin drivers that 'program call' the template and body instead of copying them
+- optional packing of several cases into one driver (one FLAC model, shared setup)
+- optional warm start from saved initial states, with a dependency graph of the drivers
+  (<batch name>_graph.json) that the batch, shard and orchestrator runs respect
+- produced drivers follow the ones written by the original nested loops:
+  template + _var_inputs block (+ _var_overrides function) + driver body + footer
+- CAUTION: file naming conventions intimately related to post-processing & plotting protocols
+"""
+import itertools
+import json
+import math
+import os
+import re
+
+from batch_files import (CALL_LINE, expand_calls, graph_path, replace_if_changed, write_batch,
+                         write_graph)
+from flac_files  import checkpoint_file
+from manifest    import (Manifest, manifest_path)
+from sharding    import write_shards
+
+FOOTER       = (";-------------Footer-------------------\n"
+                ";save @_savefile\n"
+                ";--------------------------------------\n")
+
+# Names available to the expressions of a spec file
+_EVAL_GLOBALS = {"__builtins__": {}, "int": int, "float": float, "str": str, "round": round,
+                 "min": min, "max": max, "abs": abs, "math": math}
+
+#------------------------------------------------------------
+def load_spec(spec_file):
+    with open(spec_file, "r") as f:
+        spec = json.load(f)
+
+    # all file names in the spec are relative to the folder of the spec file
+    spec_dir = os.path.dirname(os.path.abspath(spec_file))
+    spec["spec_file"] = os.path.abspath(spec_file)
+    spec["out_dir"]   = os.path.normpath(os.path.join(spec_dir, spec.get("out_dir", ".")))
+    spec["template"]  = os.path.join(spec_dir, spec["template"])
+    spec["body"]      = os.path.join(spec_dir, spec["body"])
+    if "pack" in spec:
+        spec["pack"]["body"] = os.path.join(spec_dir, spec["pack"]["body"])
+        if "sections" in spec["pack"]:
+            spec["pack"]["sections"] = os.path.join(spec_dir, spec["pack"]["sections"])
+    return spec
+
+def evaluate(expression, values):
+    if not isinstance(expression, str):
+        return expression
+    return eval(expression, _EVAL_GLOBALS, values)
+
+def read_text(file_path):
+    with open(file_path, "r") as f:
+        return f.read()
+
+def write_text(file_path, text):
+    with open(file_path, "w") as f:
+        f.write(text)
+
+#------------------------------------------------------------
+# Cases: one dictionary per driver holding constants, axes values, derived values
+# and the resulting basefile name
+def resolve_case(spec, values):
+    case = dict(spec.get("constants", {}))
+    case.update(values)
+    for name, expression in spec.get("derived", {}).items():
+        case[name] = evaluate(expression, case)
+    case["basefile"] = spec["name"].format(**case)
+    return case
+
+def iter_cases(spec, axes=None):
+    axes  = spec["axes"] if axes is None else axes
+    names = list(axes)
+    for combo in itertools.product(*(axes[name] for name in names)):
+        yield resolve_case(spec, dict(zip(names, combo)))
+
+#------------------------------------------------------------
+# Driver text
+def fish_literal(value):
+    if isinstance(value, str):
+        return "'" + value + "'"
+    return str(value)
+
+def case_inputs(spec, case):
+    inputs = [(name, evaluate(expression, case)) for name, expression in spec["inputs"]]
+    inputs.append(("_basefile", case["basefile"]))
+    if "members" in case:
+        inputs.append(("_nPack", len(case["members"])))
+        for name, expression in spec["pack"]["inputs"]:
+            inputs += [("{}({})".format(name, i), evaluate(expression, member))
+                       for i, member in enumerate(case["members"], 1)]
+    return inputs
+
+def case_overrides(spec, case):
+    return [(name, evaluate(expression, case)) for name, expression in spec.get("overrides", [])]
+
+# _var_inputs (run here) and _var_overrides (always defined, empty by default, called
+# by _input_variables of the body so that it wins over the hard-coded values)
+def var_inputs_block(spec, case):
+    width = spec.get("name_width", 12)
+    lines = [";------------GENERAL INPUT CONDITIONS------------\n",
+             "fish def _var_inputs\n"]
+    for name, value in case_inputs(spec, case):
+        lines.append("\t" + name.ljust(width) + " = " + fish_literal(value) + " \n")
+        if name == "_nPack":
+            # packed inputs follow, one array entry per packed case
+            lines.append("\tarray " + " ".join("{}({})".format(array, value)
+                                               for array, _ in spec["pack"]["inputs"]) + " \n")
+    lines.append("end \n")
+    lines.append("[_var_inputs]\n")
+    lines.append("fish def _var_overrides\n")
+    for name, value in case_overrides(spec, case):
+        lines.append("\t" + name.ljust(width) + " = " + fish_literal(value) + " \n")
+    lines.append("end \n\n")
+    return "".join(lines)
+
+def driver_text(spec, case, template, body):
+    return template + "\n\n" + var_inputs_block(spec, case) + body + FOOTER
+
+# Thin driver: the _var_inputs block between 'program call' lines of the template and
+# body files themselves (paths relative to the driver folder), a few hundred bytes
+def shared_files(spec):
+    return [os.path.relpath(spec[key], spec["out_dir"]).replace(os.sep, "/") for key in ("template", "body")]
+
+def thin_driver_text(spec, case):
+    template, body = shared_files(spec)
+    return (CALL_LINE.format(template) + "\n" + var_inputs_block(spec, case) +
+            CALL_LINE.format(body) + FOOTER)
+
+# drivers are named after their basefile unless the case names them (extend runs)
+def driver_file_name(case):
+    return case.get("driver", case["basefile"]) + ".f2fis"
+
+#------------------------------------------------------------
+# Packing: cases that differ only along the pack axis share one driver (one FLAC model)
+# - a packed case is its first member plus the list of members and the packed basefile
+# - every member keeps its own basefile, used by the packed body for its csv files
+def packed_spec(spec):
+    return dict(spec, body=spec["pack"]["body"])
+
+# - packed cases must share every input that does not depend on the pack axis (e.g.
+#   _csr_in1..5 of adaptive rounds or sampled overrides keep cases apart)
+def pack_cases(spec, cases):
+    pack, axis = spec["pack"], spec["pack"]["axis"]
+    on_axis = re.compile(r"\b{}\b".format(axis))
+    shared  = [[name, expression] for name, expression in spec["inputs"] + spec.get("overrides", [])
+               if not on_axis.search(str(expression))]
+    groups = {}
+    for case in cases:
+        key = (pack["name"].format(**dict(case, pack_first="", pack_last="")),
+               tuple(str(evaluate(expression, case)) for _, expression in shared))
+        groups.setdefault(key, []).append(case)
+    for members in groups.values():
+        for k in range(0, len(members), pack.get("size", len(members))):
+            chunk  = members[k:k + pack.get("size", len(members))]
+            packed = dict(chunk[0], members=chunk)
+            packed["basefile"] = pack["name"].format(**dict(chunk[0], pack_first=chunk[0][axis],
+                                                            pack_last=chunk[-1][axis]))
+            yield packed
+
+# Packed body: the body of the spec with its packed sections replaced, so that the parts that
+# do not depend on packing (properties, consolidation, export, ...) are written once
+# - the body marks every section that differs with a PACK_MARKER line naming it and a PACK_END
+#   line; the sections file holds the packed version of every section under its PACK_MARKER
+#   line (the text before the first one is a header)
+PACK_MARKER = re.compile(r"^;=== pack: (?!end ===)(\w+) ===\n", re.MULTILINE)
+PACK_END    = ";=== pack: end ===\n"
+
+def pack_sections(text):
+    parts = PACK_MARKER.split(text)
+    return dict(zip(parts[1::2], parts[2::2]))
+
+def packed_body(body, sections):
+    parts, sections = PACK_MARKER.split(body), dict(sections)
+    text = [parts[0]]
+    for name, rest in zip(parts[1::2], parts[2::2]):
+        if name not in sections:
+            raise ValueError("the pack sections have no section '{}' of the body".format(name))
+        section, found, after = rest.partition(PACK_END)
+        if not found:
+            raise ValueError("section '{}' of the body has no '{}' line".format(name, PACK_END.strip()))
+        text += [";=== pack: {} ===\n".format(name), sections.pop(name), PACK_END, after]
+    if sections:
+        raise ValueError("pack sections {} are not marked in the body".format(", ".join(sorted(sections))))
+    return "".join(text)
+
+# Writes the packed body file of the spec from its body and pack sections (only if it changed)
+def write_packed_body(spec):
+    if "sections" not in spec["pack"]:
+        return
+    body_path = spec["pack"]["body"]
+    write_text(body_path + ".tmp", packed_body(read_text(spec["body"]),
+                                               pack_sections(read_text(spec["pack"]["sections"]))))
+    if replace_if_changed(body_path + ".tmp", body_path):
+        print("Packed body written: {}".format(body_path))
+
+#------------------------------------------------------------
+# Warm start: cases sharing their initial state (the part of the body before STATE_MARKER:
+# consolidation, static solve and attachments) get one state driver that saves the model,
+# and drivers that restore it, set their own inputs and run the rest of the body
+STATE_MARKER = ";=== warm start: end of consolidation ==="
+LOAD_MARKER  = ";=== checkpoint: cyclic loading ==="
+
+def split_body(body, marker=STATE_MARKER):
+    head, found, tail = body.partition(marker)
+    if not found:
+        raise ValueError("the driver body has no '{}' line to split it at".format(marker))
+    return head, tail.split("\n", 1)[1]
+
+def state_spec(spec):
+    return dict(spec, inputs=spec["warm_start"]["inputs"])
+
+def state_file(state):
+    return state["basefile"] + ".sav"
+
+# [(state case, cases restoring it)] in order of first appearance
+# - cases of one state must agree on its inputs and on the overrides (secondary parameters)
+def plan_states(spec, cases):
+    states = {}
+    for case in cases:
+        state = dict(case, basefile=spec["warm_start"]["name"].format(**case))
+        key   = case_inputs(state_spec(spec), state) + case_overrides(spec, state)
+        if state["basefile"] not in states:
+            states[state["basefile"]] = (state, key, [])
+        elif states[state["basefile"]][1] != key:
+            raise ValueError("{} and {} differ in the inputs of state {}".format(
+                             states[state["basefile"]][2][0]["basefile"], case["basefile"], state["basefile"]))
+        states[state["basefile"]][2].append(case)
+    return [(state, members) for state, _, members in states.values()]
+
+def state_driver_text(spec, state, template, head):
+    return (template + "\n\n" + var_inputs_block(state_spec(spec), state) + head +
+            "model save '{}'\n".format(state_file(state)) + FOOTER)
+
+# _calc_variables (restored with the model) is run again for the inputs of the case
+def restart_driver_text(spec, case, state, template, tail):
+    return (template + "\n\n" + "model restore '{}'\n".format(state_file(state)) +
+            var_inputs_block(spec, case) + "[_calc_variables]\n" + tail + FOOTER)
+
+# Extend run: restores the checkpoint of the case and runs the body from LOAD_MARKER on,
+# i.e. the cyclic loading up to the raised _maxCycles and the export of the csv files
+def extend_driver_text(spec, case, template, tail):
+    return (template + "\n\n" + "model restore '{}'\n".format(checkpoint_file(case["basefile"])) +
+            var_inputs_block(spec, case) + "[_calc_variables]\n" + tail + FOOTER)
+
+#------------------------------------------------------------
+# Writes one driver per case and the batch file calling them all
+# - cases default to the full-factorial product of the spec axes
+# - incremental = True keeps a content-hash manifest next to the drivers: only drivers
+#   whose text changed are rewritten, the batch file is rewritten only if it changed
+#   and a *_delta.f2fis batch file calls just the added and changed drivers
+# - shards > 1 also splits the calls into balanced batch files, each one running in its
+#   own working folder (see sharding.py)
+# - cost_model (see cost_model.py) orders the calls longest job first and balances
+#   the shards by predicted cost instead of by number of drivers
+# - pack = True packs the cases along the pack axis of the spec into shared drivers, with the
+#   packed body written from the body and its pack sections first
+# - thin = True writes thin drivers that 'program call' the template and body files
+#   instead of copying them (see validate_thin)
+# - warm_start = True writes a state driver per initial state ahead of the drivers that
+#   restore it; ordering, delta batch and shards keep each state with its drivers
+# - extend = True writes extend run drivers (see extend.py) that continue from checkpoints
+# - returns the number of drivers produced
+def run_sweep(spec, cases=None, batch_file=None, incremental=False, shards=1, cost_model=None,
+              thin=False, pack=False, warm_start=False, extend=False):
+    if cases is None:
+        cases = iter_cases(spec)
+    if pack:
+        write_packed_body(spec)
+        cases = pack_cases(spec, cases)
+        spec  = packed_spec(spec)
+    if (warm_start or extend) and (thin or pack):
+        raise ValueError("warm started and extend run drivers cannot be thin or packed")
+
+    # read once for the whole sweep
+    template = read_text(spec["template"])
+    body     = read_text(spec["body"])
+
+    out_dir    = spec["out_dir"]
+    batch_file = batch_file or spec["batch_file"]
+    batch_path = os.path.join(out_dir, batch_file)
+
+    if incremental:
+        manifest = Manifest(manifest_path(out_dir, batch_file), template, body)
+
+    # (case, driver text, params, state driver file it restores or None)
+    def drivers():
+        if extend:
+            tail = split_body(body, LOAD_MARKER)[1]
+            for case in cases:
+                yield (case, extend_driver_text(spec, case, template, tail),
+                       dict(case_inputs(spec, case) + case_overrides(spec, case)), None)
+            return
+        if not warm_start:
+            for case in cases:
+                text = thin_driver_text(spec, case) if thin else driver_text(spec, case, template, body)
+                yield case, text, dict(case_inputs(spec, case) + case_overrides(spec, case)), None
+            return
+        head, tail = split_body(body)
+        for state, members in plan_states(spec, cases):
+            yield (state, state_driver_text(spec, state, template, head),
+                   dict(case_inputs(state_spec(spec), state) + case_overrides(spec, state)), None)
+            for case in members:
+                yield (case, restart_driver_text(spec, case, state, template, tail),
+                       dict(case_inputs(spec, case) + case_overrides(spec, case)), driver_file_name(state))
+
+    # drivers are streamed to disk, only their names (and costs) are kept for the batch files
+    driver_files = []
+    costs        = []
+    saves        = {}            # warm start: state driver file -> saved state file
+    depends      = {}            #             driver file -> state driver file
+    for case, text, params, after in drivers():
+        driver_file = driver_file_name(case)
+        driver_path = os.path.join(out_dir, driver_file)
+        if not incremental or manifest.needs_write(driver_file[:-len(".f2fis")], driver_path, text, params):
+            write_text(driver_path, text)
+        driver_files.append(driver_file)
+        if warm_start and after is None:
+            # state drivers only solve the static problem, their cost is left out
+            saves[driver_file] = state_file(case)
+            costs.append(0.0)
+            continue
+        if after:
+            depends[driver_file] = after
+        costs.append(cost_model.predict(params) if cost_model else 1.0)
+
+    if cost_model:
+        # state drivers stay ahead of the drivers restoring them
+        order        = sorted(range(len(driver_files)), key=lambda k: (driver_files[k] in depends, -costs[k]))
+        driver_files = [driver_files[k] for k in order]
+        costs        = [costs[k] for k in order]
+        print("Drivers ordered longest first, predicted total cost {:.4g}".format(sum(costs)))
+    if warm_start:
+        write_graph(graph_path(batch_path), saves, depends)
+        print("Warm start: {} state drivers for {} drivers, graph: {}".format(
+              len(saves), len(depends), graph_path(batch_path)))
+
+    write_batch(batch_path + ".tmp", driver_files)
+    replace_if_changed(batch_path + ".tmp", batch_path)
+
+    print("{} drivers in sweep, batch file: {}".format(len(driver_files), batch_path))
+    if incremental:
+        manifest.save()
+        manifest.report()
+        delta      = set(manifest.delta())
+        # a changed driver needs its state again
+        delta     |= {depends[f][:-len(".f2fis")] for f in driver_files if f in depends and f[:-len(".f2fis")] in delta}
+        delta_path = os.path.splitext(batch_path)[0] + "_delta.f2fis"
+        write_batch(delta_path, [f for f in driver_files if f[:-len(".f2fis")] in delta])
+        print("{} new or changed drivers, batch file: {}".format(len(delta), delta_path))
+    if shards > 1:
+        print("{} shards:".format(shards))
+        write_shards(out_dir, batch_file, driver_files, shards, costs, shared_files(spec) if thin else [],
+                     groups={f: depends.get(f, f) for f in driver_files} if warm_start else None)
+    return len(driver_files)
+
+#------------------------------------------------------------
+# Checks that thin drivers expand to the same FLAC input as the full drivers
+# - FLAC input compared line by line, ignoring blank lines and trailing spaces
+# - returns the list of basefiles that differ
+def _flac_lines(text):
+    return [line.rstrip() for line in text.splitlines() if line.strip()]
+
+def validate_thin(spec, cases=None, pack=False):
+    if cases is None:
+        cases = iter_cases(spec)
+    if pack:
+        cases = pack_cases(spec, cases)
+        spec  = packed_spec(spec)
+    template = read_text(spec["template"])
+    body     = read_text(spec["body"])
+    differ   = []
+    n_cases  = 0
+    for case in cases:
+        n_cases    += 1
+        driver_path = os.path.join(spec["out_dir"], driver_file_name(case))
+        expanded    = _flac_lines(expand_calls(driver_path))
+        full        = _flac_lines(driver_text(spec, case, template, body))
+        if expanded != full:
+            differ.append(case["basefile"])
+            line = next((k for k, (a, b) in enumerate(zip(expanded, full)) if a != b), min(len(expanded), len(full)))
+            print("  {}: differs from line {} of the full driver".format(case["basefile"], line + 1))
+    print("{} of {} thin drivers expand to the full driver input".format(n_cases - len(differ), n_cases))
+    return differ
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate PM4Sand2D drivers from a sweep spec file")
+    parser.add_argument("spec", help="JSON sweep spec file")
+    parser.add_argument("--incremental", action="store_true", help="only rewrite drivers whose content changed")
+    parser.add_argument("--shards", type=int, default=1, help="number of parallel batch files")
+    parser.add_argument("--ordering", action="store_true", help="order and balance drivers by predicted runtime")
+    parser.add_argument("--thin", action="store_true", help="thin drivers calling the shared template and body")
+    parser.add_argument("--validate", action="store_true", help="check that thin drivers expand to the full ones")
+    parser.add_argument("--pack", action="store_true", help="pack cases along the pack axis of the spec")
+    parser.add_argument("--warm-start", action="store_true", help="restore saved initial states (warm_start of the spec)")
+    args = parser.parse_args()
+    spec = load_spec(args.spec)
+    cost_model = None
+    if args.ordering:
+        from cost_model import learn_cost_model
+        cost_model = learn_cost_model(spec)
+    run_sweep(spec, incremental=args.incremental, shards=args.shards, cost_model=cost_model,
+              thin=args.thin, pack=args.pack, warm_start=args.warm_start)
+    if args.thin and args.validate:
+        validate_thin(spec, pack=args.pack)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Per-cycle metrics of element histories, read in one pass of fixed-size chunks
+- undrained histories (<basefile>_<n>.csv of cyc drivers: Ncyc,CSR,Shear_strain_%,...): cycle k
+  holds the rows with k-1 <= Ncyc < k (Ncyc is the smoothed count of _five_files); stress is the CSR
+- drained histories (MRD and vol drivers: eps_xy(%),eps_yy(%),tauxy(kPa),...): the strain-controlled
+  cycles of _strain_control start at zero strain towards positive strains, so a cycle starts where
+  eps_xy crosses zero upwards (cycles are numbered on through the strain levels); stress is tauxy (kPa)
+- per cycle:
+    rows, strain_max(%), strain_min(%), strain_peak(%) (largest |strain|), strain_DA(%) (double amplitude)
+    stress_max, stress_min
+    G_sec     : (stress_max - stress_min) / (strain_max - strain_min), stress per unit strain
+                (kPa drained, G/sigvc undrained)
+    loop_area : trapezoidal integral of stress d(strain), stress x unit strain
+    undrained : ru_max, sigv/sigvo_min
+    drained   : eps_v_inc(%) (change of eps_yy over the cycle)
+- the segment between two rows belongs to the cycle of its first row; the cycle running over a
+  chunk boundary is combined from the partial aggregates of both chunks, so memory is bounded by
+  chunksize rows plus one row per cycle
+
+Usage: python cycle_metrics.py [results folder] [--out cycle_metrics.csv] [--workers N]
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from utilities import (CATALOG_COLUMNS, ResultsCatalog, decode_name, worker_pool)
+
+CHUNK_ROWS = 200000
+
+HISTORY_COLUMNS = {"u": {"strain": "Shear_strain_%", "stress": "CSR"},
+                   "d": {"strain": "eps_xy(%)",      "stress": "tauxy(kPa)"}}
+
+# Partial aggregates per cycle and how two of them are combined
+PARTIALS = {"rows": "sum", "strain_max(%)": "max", "strain_min(%)": "min", "stress_max": "max",
+            "stress_min": "min", "loop_area": "sum"}
+EXTRA_PARTIALS = {"u": {"ru_max": "max", "sigv/sigvo_min": "min"},
+                  "d": {"eps_v_inc(%)": "sum"}}
+
+#------------------------------------------------------------
+# Partial aggregates of one chunk; carry is the last row (strain, stress, eps_v, cycle) of the
+# previous chunk, returned updated
+def chunk_partials(chunk, drain, carry):
+    names  = HISTORY_COLUMNS[drain]
+    strain = chunk[names["strain"]].to_numpy(dtype=float)
+    stress = chunk[names["stress"]].to_numpy(dtype=float)
+    eps_v  = chunk["eps_yy(%)"].to_numpy(dtype=float) if drain == "d" else np.zeros(len(chunk))
+    if drain == "u":
+        cycle = np.floor(chunk["Ncyc"].to_numpy(dtype=float)).astype(int) + 1
+    else:
+        before = np.concatenate([[carry[0] if carry else strain[0]], strain[:-1]])
+        cycle  = (carry[3] if carry else 1) + np.cumsum((before < 0) & (strain >= 0))
+
+    rows = pd.DataFrame({"cycle": cycle, "rows": 1, "strain_max(%)": strain, "strain_min(%)": strain,
+                         "stress_max": stress, "stress_min": stress})
+    if drain == "u":
+        rows["ru_max"]         = chunk["ru"].to_numpy(dtype=float)
+        rows["sigv/sigvo_min"] = chunk["sigv/sigvo"].to_numpy(dtype=float)
+    aggregates = dict(PARTIALS, **EXTRA_PARTIALS[drain])
+    rows  = rows.groupby("cycle").agg({c: aggregates[c] for c in rows.columns if c != "cycle"})
+
+    # segments from the previous row (last row of the previous chunk first) to every row
+    if carry:
+        strain, stress = np.concatenate([[carry[0]], strain]), np.concatenate([[carry[1]], stress])
+        eps_v, cycle   = np.concatenate([[carry[2]], eps_v]),  np.concatenate([[carry[3]], cycle])
+    segments = pd.DataFrame({"cycle": cycle[:-1],
+                             "loop_area": 0.5 * (stress[1:] + stress[:-1]) * np.diff(strain) / 100.0})
+    if drain == "d":
+        segments["eps_v_inc(%)"] = np.diff(eps_v)
+    segments = segments.groupby("cycle").sum()
+
+    partial = rows.join(segments, how="outer")
+    partial[list(segments.columns)] = partial[segments.columns].fillna(0.0)
+    return partial, (strain[-1], stress[-1], eps_v[-1], cycle[-1])
+
+# Per-cycle table of one element history
+def history_cycles(file, chunksize=CHUNK_ROWS):
+    drain = decode_name(file)[2]
+    aggregates, total, carry = dict(PARTIALS, **EXTRA_PARTIALS[drain]), None, None
+    for chunk in pd.read_csv(file, header=0, chunksize=chunksize):
+        if chunk.empty:
+            continue
+        partial, carry = chunk_partials(chunk, drain, carry)
+        total = partial if total is None else pd.concat([total, partial]).groupby(level=0).agg(aggregates)
+    if total is None:
+        return pd.DataFrame(columns=["cycle"] + list(aggregates))
+
+    total["rows"]            = total["rows"].fillna(0).astype(int)
+    total["strain_peak(%)"]  = np.maximum(total["strain_max(%)"].abs(), total["strain_min(%)"].abs())
+    total["strain_DA(%)"]    = total["strain_max(%)"] - total["strain_min(%)"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total["G_sec"] = (total["stress_max"] - total["stress_min"]) / (total["strain_DA(%)"] / 100.0)
+    columns = ["rows", "strain_max(%)", "strain_min(%)", "strain_peak(%)", "strain_DA(%)",
+               "stress_max", "stress_min", "G_sec", "loop_area"] + list(EXTRA_PARTIALS[drain])
+    return total[columns].rename_axis("cycle").reset_index()
+
+def _history_cycles(file, chunksize):
+    try:
+        return file, history_cycles(file, chunksize), None
+    except Exception as e:
+        return file, None, e
+
+#------------------------------------------------------------
+# Per-cycle tables of all element histories of a catalog (or list of files) on parallel workers,
+# as one table with the catalog columns in front (output is the element number)
+def cycle_table(catalog, workers=None, chunksize=CHUNK_ROWS):
+    if not isinstance(catalog, ResultsCatalog):
+        catalog = ResultsCatalog(catalog)
+    catalog = catalog.query(output=[str(n) for n in range(1, 10)])
+    files   = catalog.files
+    if not files:
+        return pd.DataFrame()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+
+    table   = catalog.table.set_index("file")
+    columns = ["basefile"] + [c for c in CATALOG_COLUMNS if table[c].notna().any()]
+    frames  = {}
+    with worker_pool(workers) as pool:
+        for file, cycles, error in pool.map(_history_cycles, files, [chunksize] * len(files)):
+            if error is not None:
+                print(f"[ERROR] Skipping {file}: {error}")
+                continue
+            frames[file] = cycles.assign(**{c: table.at[file, c] for c in columns})
+    if not frames:
+        return pd.DataFrame()
+    cycles = pd.concat(frames.values(), ignore_index=True)
+    return cycles[columns + [c for c in cycles.columns if c not in columns]]
+
+if __name__ == "__main__":
+    import argparse
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Per-cycle metrics of the element histories of a results folder")
+    parser.add_argument("results", nargs="?",
+                        default=os.path.join(script_dir, "..", "PM4Sand2D_Cyclic_DSS_undrained_batch", "results"),
+                        help="results folder (default: the undrained batch results)")
+    parser.add_argument("--out", default="cycle_metrics.csv", help="csv file of the table")
+    parser.add_argument("--workers", type=int, default=None, help="parallel files (default: number of cores)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="rows read at a time")
+    args   = parser.parse_args()
+    cycles = cycle_table(ResultsCatalog.from_folder(args.results), args.workers, args.chunksize)
+    cycles.to_csv(args.out, index=False)
+    print("{} cycles of {} histories -> {}".format(len(cycles), cycles["basefile"].nunique() if len(cycles) else 0,
+                                                   args.out))
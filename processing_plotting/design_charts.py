@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Design-chart numbers of undrained cyclic DSS results: CRR, Ksigma, Kalpha and KKo
+- CRR at any number of cycles N and for any csrN criterion comes from the CSR-N power fits of
+  all csrN files of a results catalog at once (see power_fits in utilities.py)
+- the adaptive rounds of a case (tag r1, r2, ...) are fitted together with its base run, whose
+  row holds the result (rounds=False fits every run on its own)
+- ratios are taken within groups of the same Dr, tag (samples, increment ladders, ...),
+  criterion and N, whatever grid of sigvc, alpha and Ko was run:
+    Ksigma : CRR / CRR at sigvc = sigma_ref (1 atm) with the same alpha and Ko
+    Kalpha : CRR / CRR at alpha = alpha_ref (level ground) with the same sigvc and Ko
+    KKo    : CRR / CRR at Ko = Ko_ref (0.5) with the same sigvc and alpha
+  (NaN where the case or its reference has fewer than 3 cycles > 0 for the criterion)
+- the table is cached in results/.cache/design_table.csv and computed again only when a csrN
+  file was added, removed or changed (size or mtime) or when the arguments are different
+- triggering=True (--triggering) reads the csrN tables that triggering.py wrote to
+  results/triggering instead of the FLAC ones (the catalog does not look into subfolders);
+  give their criteria with criteria=[...] (--criteria), the table is cached in that folder
+
+Usage: python design_charts.py [results folder] [--N 15 30] [--triggering] [--criteria ...] [--out design_table.csv]
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from triggering import TRIGGER_FOLDER
+from utilities  import (CACHE_FOLDER, CSRN_CRITERIA, ResultsCatalog, power_fits)
+
+GROUP_COLUMNS = ["Dr", "tag", "sigvc", "alpha", "Ko", "criterion", "N"]
+TABLE_COLUMNS = GROUP_COLUMNS + ["basefile", "points", "b", "amplitude", "R2", "CRR", "CRR_low", "CRR_high",
+                                 "Ksigma", "Kalpha", "KKo"]
+
+#------------------------------------------------------------
+# CRR / CRR of the reference value of column within every group of the other columns
+def reference_ratio(table, column, reference):
+    keys = [c for c in GROUP_COLUMNS if c != column]
+    refs = table[np.isclose(table[column], reference)][keys + ["CRR"]].rename(columns={"CRR": "CRR_ref"})
+    refs = refs.drop_duplicates(subset=keys)
+    return (table["CRR"].to_numpy() /
+            table[keys].merge(refs, on=keys, how="left")["CRR_ref"].to_numpy())
+
+def chart_table(catalog, N=15, criteria=CSRN_CRITERIA, sigma_ref=1.0, alpha_ref=0.0, Ko_ref=0.5,
+                bootstrap=0, seed=None, rounds=True):
+    fits = power_fits(catalog.query(goal="cyc", drainage="u"), criteria, N, bootstrap, seed=seed, rounds=rounds)
+    if fits.empty:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    fits["Ksigma"] = reference_ratio(fits, "sigvc", sigma_ref)
+    fits["Kalpha"] = reference_ratio(fits, "alpha", alpha_ref)
+    fits["KKo"]    = reference_ratio(fits, "Ko", Ko_ref)
+    return fits[TABLE_COLUMNS].sort_values(GROUP_COLUMNS).reset_index(drop=True)
+
+#------------------------------------------------------------
+# Key of the csrN files of a catalog (names, sizes, mtimes) and of the arguments
+def table_key(catalog, **arguments):
+    files = []
+    for file in sorted(catalog.query(output="csrN").files):
+        stat = os.stat(file)
+        files.append([os.path.basename(file), stat.st_size, stat.st_mtime_ns])
+    text = json.dumps([files, {k: np.atleast_1d(v).tolist() for k, v in sorted(arguments.items())}])
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+# Design table of the results in results_dir (cached, see above), of its triggering folder
+# when triggering
+def design_table(results_dir, N=15, criteria=CSRN_CRITERIA, sigma_ref=1.0, alpha_ref=0.0, Ko_ref=0.5,
+                 bootstrap=0, seed=None, cache=True, rounds=True, triggering=False):
+    if triggering:
+        results_dir = os.path.join(results_dir, TRIGGER_FOLDER)
+    catalog   = ResultsCatalog.from_folder(results_dir)
+    arguments = dict(N=N, criteria=criteria, sigma_ref=sigma_ref, alpha_ref=alpha_ref, Ko_ref=Ko_ref,
+                     bootstrap=bootstrap, seed=-1 if seed is None else seed, rounds=int(rounds))
+    csv_path  = os.path.join(results_dir, CACHE_FOLDER, "design_table.csv")
+    key_path  = os.path.join(results_dir, CACHE_FOLDER, "design_table.json")
+    key       = table_key(catalog, **arguments)
+    if cache and os.path.isfile(csv_path) and os.path.isfile(key_path):
+        with open(key_path, "r") as f:
+            if json.load(f).get("key") == key:
+                return pd.read_csv(csv_path, dtype={"tag": str}).fillna({"tag": ""})
+
+    table = chart_table(catalog, N, criteria, sigma_ref, alpha_ref, Ko_ref, bootstrap, seed, rounds)
+    if cache:
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+        table.to_csv(csv_path, index=False)
+        with open(key_path, "w") as f:
+            json.dump({"key": key}, f)
+    return table
+
+if __name__ == "__main__":
+    import argparse
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="CRR, Ksigma, Kalpha and KKo of undrained cyclic DSS results")
+    parser.add_argument("results", nargs="?",
+                        default=os.path.join(script_dir, "..", "PM4Sand2D_Cyclic_DSS_undrained_batch", "results"),
+                        help="results folder (default: the undrained batch results)")
+    parser.add_argument("--N", type=float, nargs="+", default=[15.0], help="numbers of cycles of CRR")
+    parser.add_argument("--bootstrap", type=int, default=0, help="bootstrap samples of the CRR intervals")
+    parser.add_argument("--triggering", action="store_true",
+                        help="use the csrN files of triggering.py (results/triggering) instead of FLAC's")
+    parser.add_argument("--criteria", nargs="+", default=CSRN_CRITERIA,
+                        help="csrN criteria (default: the three of _summary)")
+    parser.add_argument("--out", default=None, help="csv file of the table (default: print a summary)")
+    args  = parser.parse_args()
+    table = design_table(args.results, N=args.N, criteria=args.criteria, bootstrap=args.bootstrap,
+                         triggering=args.triggering)
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print("{} rows -> {}".format(len(table), args.out))
+    else:
+        shown = "Ncyc_to_3%_strain" if "Ncyc_to_3%_strain" in args.criteria else args.criteria[0]
+        print(table[table["criterion"] == shown][GROUP_COLUMNS[:-2] + ["N", "CRR", "Ksigma", "Kalpha", "KKo"]]
+              .to_string(index=False))
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Modulus reduction and damping of drained strain-controlled DSS runs, recomputed from the
+element histories (<basefile>_1.csv ... _5.csv: eps_xy(%),eps_yy(%),tauxy(kPa),...) instead
+of the _MRD.csv file of the _summary FISH function
+- _strain_control runs _nCycles cycles at every strain level, each from zero strain to
+  +limit, -limit and back to zero: a cycle starts where eps_xy crosses zero upwards
+- per cycle and element, as in _strain_control but with the strain peaks of the history
+  in place of the nominal limit:
+    eps_xy(%) : strain amplitude, (max - min) / 2
+    G(kPa)    : (tauPos - tauNeg) / (max - min), tau at the positive and negative strain peaks
+    G/Gmax    : G / G of the first cycle of the element
+    D(%)      : 100 * loop area / (4 pi WorkStored), WorkStored = 0.25 (tauPos - tauNeg) amplitude
+- the five elements of a run are done at once on the stacked histories (segment reductions,
+  no loop over cycles)
+- cycles are grouped in strain levels of cycles_per_level cycles (the Ncyc of the name), and
+  select_cycles keeps one row per level: the first cycle, the last one (as the figures) or the
+  mean of all of them; it works on the _MRD.csv files too (one row per cycle)
+
+Usage: python modulus_reduction.py [results folder] [--selection last] [--out MRD_table.csv]
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from utilities import (CATALOG_COLUMNS, ResultsCatalog, load_results, worker_pool)
+
+SELECTIONS      = ["first", "last", "mean"]
+LEVEL_TOLERANCE = 0.1   # relative change of the amplitude that starts a new strain level
+MRD_COLUMNS     = ["eps_xy(%)", "G(kPa)", "G/Gmax", "D(%)"]
+
+#------------------------------------------------------------
+# Per-cycle G, G/Gmax and D of the histories of one or more elements
+# - strains (%) and stresses (kPa): one array per element
+# - returns a table with element (1, 2, ...), cycle and MRD_COLUMNS; cycles that do not reach
+#   both a positive and a negative strain (e.g. the last rows at zero strain) are left out
+def cycle_mrd(strains, stresses):
+    element = np.concatenate([np.full(len(s), n) for n, s in enumerate(strains, 1)])
+    strain  = np.concatenate(strains).astype(float) / 100.0
+    tau     = np.concatenate(stresses).astype(float)
+    if not len(strain):
+        return pd.DataFrame(columns=["element", "cycle"] + MRD_COLUMNS)
+
+    first = np.r_[True, element[1:] != element[:-1]]
+    up    = np.r_[False, (strain[:-1] < 0) & (strain[1:] >= 0)]
+    ids   = np.cumsum(first | up)                       # one id per element and cycle
+    cycle = ids - ids[first][element - element[0]] + 1
+
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends   = np.r_[starts[1:], len(ids)] - 1
+    order  = np.lexsort((strain, ids))                  # by cycle, then strain
+    i_min, i_max = order[starts], order[ends]
+
+    # loop area: segment k -> k+1 belongs to the cycle of row k (none between elements)
+    segment = np.zeros(len(strain))
+    segment[:-1] = 0.5 * (tau[1:] + tau[:-1]) * np.diff(strain)
+    segment[:-1][first[1:]] = 0.0
+    work = np.add.reduceat(segment, starts)
+
+    range_strain = strain[i_max] - strain[i_min]
+    range_tau    = tau[i_max] - tau[i_min]
+    keep = (strain[i_max] > 0) & (strain[i_min] < 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table = pd.DataFrame({"element": element[starts], "cycle": cycle[starts],
+                              "eps_xy(%)": 50.0 * range_strain,
+                              "G(kPa)": range_tau / range_strain,
+                              "D(%)": 100.0 * work / (4 * np.pi * 0.125 * range_tau * range_strain)})[keep]
+    table = table.reset_index(drop=True)
+    table.insert(4, "G/Gmax", table["G(kPa)"] / table.groupby("element")["G(kPa)"].transform("first"))
+    return table
+
+# Strain level (1, 2, ...) of every row of a table ordered by cycle within each group of columns by
+# - cycles_per_level rows per level, or a new level where eps_xy(%) changes by more than tolerance
+def strain_levels(table, cycles_per_level=None, by=(), tolerance=LEVEL_TOLERANCE):
+    groups = table.groupby(list(by), sort=False) if by else table.groupby(np.zeros(len(table)), sort=False)
+    if cycles_per_level:
+        return groups.cumcount() // int(cycles_per_level) + 1
+    amplitude = table["eps_xy(%)"]
+    previous  = groups["eps_xy(%)"].shift()
+    new_level = previous.isna() | ((amplitude - previous).abs() > tolerance * previous.abs())
+    return new_level.groupby(groups.ngroup()).cumsum().astype(int)
+
+# One row per strain level: selection 'first', 'last' or 'mean' of its cycles
+# - table: per-cycle rows (of cycle_mrd or mrd_table, or an _MRD.csv file), by: its group columns
+def select_cycles(table, selection="last", cycles_per_level=None, by=(), tolerance=LEVEL_TOLERANCE):
+    if selection not in SELECTIONS:
+        raise ValueError("unknown cycle selection '{}', use one of {}".format(selection, SELECTIONS))
+    keys   = list(by) + ["level"]
+    table  = table.assign(level=strain_levels(table, cycles_per_level, by, tolerance).to_numpy())
+    values = [c for c in table.columns if c not in keys and pd.api.types.is_numeric_dtype(table[c])]
+    others = [c for c in table.columns if c not in keys and c not in values]
+    agg    = dict({c: selection for c in values}, **{c: "first" for c in others})
+    return table.groupby(keys, sort=False).agg(agg).reset_index()[list(table.columns)]
+
+#------------------------------------------------------------
+# Per-cycle table of a run from its element files (any of its <basefile>_<n>.csv), with the
+# values of its _MRD.csv file (columns ending in '_FLAC') when that file is given
+def run_mrd(element_files, summary_file=None):
+    outputs = [int(f[:-4].rsplit("_", 1)[1]) for f in element_files]
+    data    = [load_results(f, usecols=["eps_xy(%)", "tauxy(kPa)"]) for f in element_files]
+    table   = cycle_mrd([d["eps_xy(%)"].to_numpy() for d in data], [d["tauxy(kPa)"].to_numpy() for d in data])
+    table["element"] = np.array(outputs)[table["element"].to_numpy(dtype=int) - 1]
+    if summary_file:
+        flac = load_results(summary_file)
+        long = pd.concat([pd.DataFrame({"element": n, "cycle": np.arange(1, len(flac) + 1),
+                                        "G(kPa)_FLAC": flac["G{}(kPa)".format(n)].to_numpy(),
+                                        "G/Gmax_FLAC": flac["G/Gmax{}".format(n)].to_numpy(),
+                                        "D(%)_FLAC": flac["D{}(%)".format(n)].to_numpy()})
+                          for n in outputs], ignore_index=True)
+        table = table.merge(long, on=["element", "cycle"], how="left")
+    return table
+
+def _run_mrd(basefile, element_files, summary_file):
+    try:
+        return basefile, run_mrd(element_files, summary_file), None
+    except Exception as e:
+        return basefile, None, e
+
+# Per-cycle (selection None) or per-level table of all drained runs of a catalog, on parallel
+# workers, with the catalog columns in front
+def mrd_table(catalog, selection="last", workers=None):
+    catalog  = catalog.query(drainage="d")
+    table    = catalog.table
+    elements = table[table["output"].isin([str(n) for n in range(1, 10)])]
+    summary  = table[table["output"] == "MRD"].set_index("basefile")["file"]
+    runs     = [(basefile, list(group["file"]), summary.get(basefile))
+                for basefile, group in elements.groupby("basefile", sort=True)]
+    if not runs:
+        return pd.DataFrame()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(runs)))
+
+    first   = elements.drop_duplicates("basefile").set_index("basefile")
+    columns = [c for c in CATALOG_COLUMNS if c != "output" and first[c].notna().any()]
+    frames  = []
+    with worker_pool(workers) as pool:
+        for basefile, cycles, error in pool.map(_run_mrd, *zip(*runs)):
+            if error is not None:
+                print(f"[ERROR] Skipping {basefile}: {error}")
+                continue
+            if selection:
+                cycles = select_cycles(cycles, selection, first.at[basefile, "Ncyc"], by=["element"])
+            frames.append(cycles.assign(basefile=basefile, **{c: first.at[basefile, c] for c in columns}))
+    if not frames:
+        return pd.DataFrame()
+    mrd = pd.concat(frames, ignore_index=True)
+    columns = ["basefile"] + columns
+    return mrd[columns + [c for c in mrd.columns if c not in columns]]
+
+# Table of one run in the layout of its _MRD.csv file (eps_xy(%),G1(kPa),G/Gmax1,D1(%),G2(kPa),...),
+# the strain amplitude averaged over the elements
+def wide_table(table):
+    key  = "level" if "level" in table.columns else "cycle"
+    wide = table.pivot(index=key, columns="element", values=["G(kPa)", "G/Gmax", "D(%)"])
+    columns = {}
+    for n in sorted(table["element"].unique()):
+        columns["G{}(kPa)".format(n)] = wide[("G(kPa)", n)]
+        columns["G/Gmax{}".format(n)] = wide[("G/Gmax", n)]
+        columns["D{}(%)".format(n)]   = wide[("D(%)", n)]
+    strain = table.groupby(key)["eps_xy(%)"].mean()
+    return pd.DataFrame(dict({"eps_xy(%)": strain}, **columns)).reset_index(drop=True)
+
+if __name__ == "__main__":
+    import argparse
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="G, G/Gmax and damping of drained runs from their element histories")
+    parser.add_argument("results", nargs="?",
+                        default=os.path.join(script_dir, "..", "PM4Sand2D_Cyclic_DSS_drained_batch", "results"),
+                        help="results folder (default: the drained batch results)")
+    parser.add_argument("--selection", default="last", choices=SELECTIONS + ["all"],
+                        help="cycle kept per strain level ('all': every cycle)")
+    parser.add_argument("--out", default="MRD_table.csv", help="csv file of the table")
+    parser.add_argument("--workers", type=int, default=None, help="parallel runs (default: number of cores)")
+    args = parser.parse_args()
+    mrd  = mrd_table(ResultsCatalog.from_folder(args.results), None if args.selection == "all" else args.selection,
+                     args.workers)
+    mrd.to_csv(args.out, index=False)
+    if "G(kPa)_FLAC" in mrd.columns:
+        diff = ((mrd["G(kPa)"] - mrd["G(kPa)_FLAC"]).abs() / mrd["G(kPa)_FLAC"].abs()).max()
+        print("Largest relative difference of G from the _MRD.csv files: {:.3g}".format(diff))
+    print("{} rows of {} runs -> {}".format(len(mrd), mrd["basefile"].nunique() if len(mrd) else 0, args.out))
@@ -13,7 +13,15 @@ Created on Wed Jun 22 23:15:13 2022
 - Code assumes that drivers and their results are placed one level up from code
     location & each group in their own folder
 - decode_name function extracts information from each FLAC-produced txt file
-- create_file_list function synthesizes list of all files that satisfy criteria
+- load_results reads the .csv files through a binary cache (results/.cache), so repeated
+    runs of this file do not parse the same .csv files again
+- histories are thinned with downsample to about 'points' rows per curve, keeping the
+    peaks of every cycle
+- the MRD curves keep one cycle per strain level (select_cycles of modulus_reduction.py:
+    'first', 'last' or 'mean'); with from_histories = True they are recomputed from the
+    element histories instead of read from the _MRD.csv files
+- ResultsCatalog decodes all file names once; its query method lists the files that
+    satisfy criteria (numbers compared as numbers)
     examples are provided at each location where it is used. If no files found 
     to meet criteria then plots will come out empty (this could mean the files
     are not there or the filter criteria where not setup appropriately)
@@ -25,12 +33,12 @@ import numpy as np
 import scipy.optimize as sciopt
 import os
 
-import glob
 import pandas as pd
 import numpy  as np
 import matplotlib.pyplot as plt
 from   matplotlib.ticker     import (AutoMinorLocator, MultipleLocator)
-from   utilities import (decode_name, create_file_list)
+from   utilities import (decode_name, ResultsCatalog, load_results, downsample)
+from   modulus_reduction import (run_mrd, select_cycles, wide_table)
 
 plt.style.use('default')
 
@@ -38,9 +46,8 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 plt.style.use(os.path.join(script_dir, 'ucdavis.mplstyle'))
 # 
 results_dir   = os.path.join(script_dir, "..", "PM4Sand2D_Cyclic_DSS_drained_batch", "results")
-search_string = os.path.join(results_dir, "*.csv")
 
-all_files     = glob.glob(search_string)
+catalog       = ResultsCatalog.from_folder(results_dir)
 
 #== ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** 
 # Dictionaries for ... styling plots
@@ -74,20 +81,24 @@ EPRI_36_76_m = np.array([[0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1,
                          [1,1,1,0.98, 0.9, 0.75, 0.5, 0.28, 0.12, 0.066, 0.037],
                          [0.2, 0.3, 0.65, 1.2, 2.3, 4.2, 8.2, 14, 21, 25.2, 28.8]])
 #-----------------------------------------------------------------------------------------
-# Inputs for create_file_list 
+# Inputs for the catalog queries 
 
-skip    = 1   # 1 implies skipping no rows - can increase if slow
+points  = 4000  # rows kept per history (0 keeps all) - peaks and reversals are always kept
+                # (or set history_budget in the generator)
+cycle_selection = 'last'   # cycle kept at each strain level: 'first', 'last' or 'mean'
+from_histories  = False    # True: G, G/Gmax and D from the element histories (modulus_reduction.py)
 ylimtop = {'35': 80, '55': 100,  '75': 120}  #axes limits
 ylimbot = {'35': 250, '55': 300, '75': 400}  #axes limits
 
+#%%
 for k,density in enumerate(['35', '55', '75']):
-    # create_file_list receives all csv files in the folder, and filters those that are for MRD curves,
+    # the catalog holds all csv files in the folder, the query keeps those that are for MRD curves,
     # selects only outputs 2 and 3 (elements under 100 and 400 kPa respectively)
-    # other entries are left empty (no filter applied)
-    fig_files_left    = create_file_list(all_files, [],['MRD'],[],[density],[],['2','3'])
+    # other columns are left out (no filter applied)
+    fig_files_left    = catalog.query(goal='MRD', Dr=density, output=['2','3']).files
     
     # selects only outputs _MRD.csv that are the FLAC post-processed for the MRD curves
-    fig_files_right   = create_file_list(all_files, [],['MRD'],[],[density],[],['MRD'])
+    fig_files_right   = catalog.query(goal='MRD', Dr=density, output='MRD').files
 
        
     # Create empty plot 
@@ -99,7 +110,7 @@ for k,density in enumerate(['35', '55', '75']):
         [driver, goal, water, density, extra, output] = decode_name(file)
         
         try:
-            df = pd.read_csv(file, header = 0,usecols = ['eps_xy(%)','tauxy(kPa)'],skiprows=lambda x: x > 3 and x % skip)
+            df = downsample(load_results(file, usecols = ['eps_xy(%)','tauxy(kPa)']), points)
         except Exception as e:
             print(f"[ERROR] Skipping {file}: {e}")
             continue
@@ -129,7 +140,11 @@ for k,density in enumerate(['35', '55', '75']):
         numCyc = int(extra[0][4:])   # number of cycles at each stress! required to avoid multiple points
         
         try:
-            df = pd.read_csv(file, header = 0, skiprows=lambda x: x % numCyc)
+            if from_histories:
+                df = run_mrd([file[:-len('MRD.csv')] + '{}.csv'.format(n) for n in range(1, 6)])
+                df = wide_table(select_cycles(df, cycle_selection, numCyc, by = ['element']))
+            else:
+                df = select_cycles(load_results(file), cycle_selection, numCyc)
         except Exception as e:
             print(f"[ERROR] Skipping {file}: {e}")
             continue
@@ -191,12 +206,13 @@ for k,density in enumerate(['35', '55', '75']):
 
 #%%
 #-----------------------------------------------------------------------------------------
-# Function here keeps the _vol outputs (so DSS strain controlled drivers ran at the same strain for multiple
-# cycles). Fifth entry can be left either empty to keep all files OR received two entries: one for the 
-# Number of cycles applied and one for the strain at which the elements were exercised
+# Query here keeps the _vol outputs (so DSS strain controlled drivers ran at the same strain for multiple
+# cycles). Ncyc and maxStrain can be left out to keep all files OR be given: the 
+# Number of cycles applied and the strain (%) at which the elements were exercised
 # Element 2 is kept for 100 kPa (can be changed, colors and annotations will be updated)
 
-fig_420_files = create_file_list(all_files,[],['vol'],[],[],[['20'],['1%']],['2'])
+element = '2'
+fig_420_files = catalog.query(goal='vol', Ncyc=20, maxStrain=1, output=element).files
 
 # Create empty plot 
 fig, axs = plt.subplots(nrows = 1, ncols = 3, figsize=(8,4), squeeze = False)
@@ -205,8 +221,7 @@ for file in fig_420_files:
     [driver, goal, water, density, extra, output] = decode_name(file)
     
     try:
-        df = pd.read_csv(file, header = 0, 
-               usecols = ['eps_xy(%)', 'eps_yy(%)'],skiprows=lambda x: x > 3 and x % skip)    
+        df = downsample(load_results(file, usecols = ['eps_xy(%)', 'eps_yy(%)']), points)
     except Exception as e:
         print(f"[ERROR] Skipping {file}: {e}")
         continue
@@ -235,7 +250,7 @@ for row,axes in enumerate(axs):
         text1 = "Drained Simple Shear\n"
         text1 = text1 + "$D_{Ro}$ = "
         text1 = text1 + "{:.0f}%, ".format(location_dens_dict[col])
-        text1 = text1 + "σ$'_{vc}$ = " +  element_dict[output]
+        text1 = text1 + "σ$'_{vc}$ = " +  element_dict[element]
         axis.text(0.95, 0.05, text1, transform=axis.transAxes, ha = "right",
                   bbox=dict(facecolor='white', edgecolor='none', alpha=1, pad = 2))
                 
@@ -15,7 +15,18 @@ Updated April 9, 2024; May 14, 2025
 - Code assumes that drivers and their results are placed one level up from code
     location & each group in their own folder
 - decode_name function extracts information from each FLAC-produced .csv file
-- create_file_list function synthesizes list of all files that satisfy criteria
+- load_results reads the .csv files through a binary cache (results/.cache), so repeated
+    runs of this file do not parse the same .csv files again; load_many reads the files
+    of a query in parallel (the csrN files once for all figures), power_fits fits the
+    CSR-N points of all of them at once
+- design_table (design_charts.py) gives CRR, Ksigma, Kalpha and KKo of every case for the
+    grid that was run (Figs 4-8 and 4-10)
+- histories are thinned with downsample to about 'points' rows per curve, keeping the
+    peaks of every cycle and the first rows past the strain used by each figure
+- every figure is drawn in its own cell (#%%) from the variables of the first cell only, so
+    render_figures.py can run the cells in parallel worker processes without a display
+- ResultsCatalog decodes all file names once; its query method lists the files that
+    satisfy criteria (numbers compared as numbers, so '0.1' and '0.10' match)
     examples are provided at each location where it is used. If no files found 
     to meet criteria then plots will come out empty (this could mean the files
     are not there or the filter criteria where not setup appropriately)
@@ -25,12 +36,13 @@ Updated April 9, 2024; May 14, 2025
 
 import numpy as np
 import os
-import glob
 import pandas as pd
 import matplotlib.pyplot as plt
 from   matplotlib.ticker import (AutoMinorLocator, MultipleLocator)
 from   matplotlib.lines  import Line2D
-from   utilities import (power_fit, decode_name, create_file_list,clean_legend)
+from   utilities import (decode_name, ResultsCatalog, clean_legend, load_many,
+                         downsample, power_fits, fit_curve, merge_rounds)
+from   design_charts import design_table
 
 plt.style.use('default')
 
@@ -38,9 +50,18 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 plt.style.use(os.path.join(script_dir, 'ucdavis.mplstyle'))
 # 
 results_dir   = os.path.join(script_dir, "..", "PM4Sand2D_Cyclic_DSS_undrained_batch", "results")
-search_string = os.path.join(results_dir, "*.csv")
 
-all_files     = glob.glob(search_string)
+catalog       = ResultsCatalog.from_folder(results_dir)
+
+# csrN summary files of Figs 4-6 to 4-11, read once in parallel
+csrN_tables   = merge_rounds(load_many(catalog.query(output='csrN')))   # adaptive rounds with their base run
+# CSR-N power fits of all csrN files and criteria at once (Fig 4-6)
+csrN_fits     = power_fits(csrN_tables, bootstrap = 0)
+# CRR15, Ksigma, Kalpha and KKo of all cases (Figs 4-8 and 4-10), cached in results/.cache
+design        = design_table(results_dir, N = 15)
+
+points = 4000  # rows kept per history (0 keeps all) - about the width of a figure at 600 dpi;
+               # peaks and reversals are always kept (or set history_budget in the generator)
 #== ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** 
 # Dictionaries for ... styling plots
 
@@ -89,25 +110,26 @@ mar_Ko_dict      = {'0.3': 'o', '0.5': '^', '0.8': 's', '1.2': 'd'}
 #== ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** 
 # Figure numbers correspond to PM4Sand Manual
 #== ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** == ** 
+#%%
 
-# create_file_list(fileList, driverType = [], testType  = [], drainType = [], 
-                                     # density    = [], extraInfo = [], output    = [])
-
-# 1) entry 1: empty (they are all DSS anyways - nothing to filter)
-# 2) entry 2: empty (they are all cyc anyways - nothing to filter))
-# 3) entry 3: empty (they are all undrained anyways - nothing to filter))
-# 4) entry 4: density string value
-# 5) entry 5  has three parts: Part 1 = overburdens, Part 2 = alphas, Part 3 = Ko
-# 6) empty 6: read element 3 that is exercised under the CRR
+# catalog.query(driver, goal, drainage, Dr, tag, sigvc, alpha, Ko, Ncyc, maxStrain, output)
+# - a value, a list of values or a range slice(low, high); columns left out are not filtered
 
-Fig42_files = create_file_list(all_files, [],[],[],['35'],[['1'],['0.0','0.1','0.2'],['0.5']],['3'])
-Fig43_files = create_file_list(all_files, [],[],[],['55'],[['1'],['0.0','0.1','0.2'],['0.5']],['3'])
-Fig44_files = create_file_list(all_files, [],[],[],['75'],[['1'],['0.0','0.1','0.2'],['0.5']],['3'])
+# 1) driver, goal, drainage: left out (they are all undrained cyclic DSS anyways - nothing to filter)
+#    tag: '' keeps the base runs only (adaptive rounds _r1, samples _s0001 and increment ladders _inc
+#    write to the same results folder)
+# 2) Dr: density
+# 3) sigvc, alpha, Ko: overburdens, alphas, Ko
+# 4) output: read element 3 that is exercised under the CRR
 
-skip = 1  # 1 implies skipping no rows - can increase if slow
+Fig42_files = catalog.query(tag='', Dr=35, sigvc=1, alpha=[0.0, 0.1, 0.2], Ko=0.5, output='3').files
+Fig43_files = catalog.query(tag='', Dr=55, sigvc=1, alpha=[0.0, 0.1, 0.2], Ko=0.5, output='3').files
+Fig44_files = catalog.query(tag='', Dr=75, sigvc=1, alpha=[0.0, 0.1, 0.2], Ko=0.5, output='3').files
 
 # Three figures with stress-strain loops and stress paths for 35, 55, 75
 filelist_ar = [Fig42_files, Fig43_files, Fig44_files]
+history_tables = load_many(Fig42_files + Fig43_files + Fig44_files,
+                           usecols = ['Shear_strain_%','CSR','sigv/sigvo'])
 
 for fileind, filelist in enumerate(filelist_ar):
     fig, axs = plt.subplots(nrows = 3, ncols = 2, figsize=(6.25,6.25))
@@ -117,11 +139,9 @@ for fileind, filelist in enumerate(filelist_ar):
         alpha = extra[1][1:]
         Ko    = extra[2][2:]
         
-        try:
-            df = pd.read_csv(file, header = 0,  usecols = ['Shear_strain_%','CSR','sigv/sigvo'],skiprows=range(1,3))
-        except Exception as e:
-            print(f"[ERROR] Skipping {file}: {e}")
+        if file not in history_tables:  # could not be read (reported by load_many)
             continue
+        df = downsample(history_tables[file].iloc[2:], points, ['Shear_strain_%','CSR','sigv/sigvo'])
         #----------------------------------------------------------------------
         axs_row = alpha_dict[alpha]
         
@@ -172,17 +192,15 @@ for fileind, filelist in enumerate(filelist_ar):
 # One figure with zoomed in stress-strain loops for 35, 55, 75
 
 #-----------------------------------------------------------------------------------------
-# 1) entry 1: empty (they are all DSS anyways - nothing to filter)
-# 2) entry 2: empty (they are all cyc anyways - nothing to filter))
-# 3) entry 3: empty (they are all undrained anyways - nothing to filter))
-# 4) entry 4: empty so that it reads all densities
-# 5) entry 5  has three parts: Part 1 = overburdens, Part 2 = alphas, Part 3 = Ko
-# 6) empty 6: read element 3 that is exercised under the CRR
+# 1) driver, goal, drainage: left out (they are all undrained cyclic DSS anyways - nothing to filter)
+# 2) Dr: left out so that it reads all densities
+# 3) sigvc, alpha, Ko: overburdens, alphas, Ko
+# 4) output: read element 3 that is exercised under the CRR
 
 
-Fig45_files = create_file_list(all_files, [],[],[],[],[['1'],['0.0'],['0.5']],['3'])
+Fig45_files  = catalog.query(tag='', sigvc=1, alpha=0.0, Ko=0.5, output='3').files
+Fig45_tables = load_many(Fig45_files, usecols = ['Shear_strain_%','CSR','Ncyc'])
 
-skip = 1
 fig, axs = plt.subplots(nrows = 3, ncols = 1, figsize=(4,7.5), squeeze = False)
 for ind, file in enumerate(Fig45_files):
     cycNum = 0
@@ -192,11 +210,10 @@ for ind, file in enumerate(Fig45_files):
     alpha = extra[1][1:]
     Ko    = extra[2][2:]
         
-    try:
-        df = pd.read_csv(file,header = 0,usecols = ['Shear_strain_%','CSR','Ncyc'],skiprows=lambda x: x > 3 and x % skip)
-    except Exception as e:
-        print(f"[ERROR] Skipping {file}: {e}")
+    if file not in Fig45_tables:        # could not be read (reported by load_many)
         continue
+    # keeps the first row past 2% strain, where the loops are cut
+    df = downsample(Fig45_tables[file], points, ['Shear_strain_%','CSR'], criteria = {'Shear_strain_%': [2.0]})
 
     cycNumStop = df[abs(df['Shear_strain_%']) >= 2.0]['Ncyc'].values[0]
     
@@ -226,14 +243,12 @@ plt.close()
 # %%
 # One figure CSR - Ncyc for 100kPa, all Dr, various triggering criteria
 #-----------------------------------------------------------------------------------------
-# 1) entry 1: empty (they are all DSS anyways - nothing to filter)
-# 2) entry 2: empty (they are all cyc anyways - nothing to filter))
-# 3) entry 3: empty (they are all undrained anyways - nothing to filter))
-# 4) entry 4: empty so that it reads all densities
-# 5) entry 5  has three parts: Part 1 = overburdens, Part 2 = alphas, Part 3 = Ko
-# 6) empty 6: read the summary csrN.txt from FLAC that carries the liquefaction triggering information
+# 1) driver, goal, drainage: left out (they are all undrained cyclic DSS anyways - nothing to filter)
+# 2) Dr: left out so that it reads all densities
+# 3) sigvc, alpha, Ko: overburdens, alphas, Ko
+# 4) output: read the summary csrN.csv from FLAC that carries the liquefaction triggering information
 
-Fig46_files = create_file_list(all_files, [],[],[],[],[['1'],['0.0'],['0.5']],['csrN'])
+Fig46_files = catalog.query(tag='', sigvc=1, alpha=0.0, Ko=0.5, output='csrN').files
 
 # Define the desired order of density labels
 density_order = ['35', '55', '75']
@@ -246,16 +261,14 @@ legend_dict = {density: {'handle': None, 'label': None} for density in density_o
 for ind, file in enumerate(Fig46_files):
     [driver, goal, water, density, extra, output] = decode_name(file)
     
-    try:
-        df = pd.read_csv(file, header=0)
-    except Exception as e:
-        print(f"[ERROR] Skipping {file}: {e}")
+    if file not in csrN_tables:     # could not be read (reported by load_many)
         continue
+    df = csrN_tables[file]
  
     ##need to get fits from points: CSR versus cycNum
     pts = 100    
     if len(df[df['Ncyc_to_98%_ru'] > 0]) >= 3:  # need at least three points to fit properly
-        [ind_1p, amp_1p, s1p_x, s1p_y] = power_fit(df, 'Ncyc_to_98%_ru', 'CSR', pts)
+        [ind_1p, amp_1p, s1p_x, s1p_y] = fit_curve(csrN_fits, file, 'Ncyc_to_98%_ru', pts)
         axs[0, 0].plot(s1p_x, s1p_y, color='grey', ls="--")
         axs[0, 0].text(0.99 * s1p_x[int(pts * 0.05)], 1.15 * s1p_y[int(pts * 0.05)], "b = {:.2f}".format(-ind_1p),
                        bbox=dict(facecolor='white', edgecolor='none', alpha=1, pad=1))
@@ -273,7 +286,7 @@ for ind, file in enumerate(Fig46_files):
             label=None)
     #--------------------------------------------------------------------
     if len(df[df['Ncyc_to_1%_strain'] > 0]) >= 3: #need at least three points to fit properly
-        [ind_3p, amp_3p, s3p_x, s3p_y] = power_fit(df, 'Ncyc_to_1%_strain', 'CSR', pts) 
+        [ind_3p, amp_3p, s3p_x, s3p_y] = fit_curve(csrN_fits, file, 'Ncyc_to_1%_strain', pts)
         axs[1, 0].plot(s3p_x, s3p_y, color='grey', ls="--")
         axs[1, 0].text(s3p_x[int(pts * 0.05)], 1.15 * s3p_y[int(pts * 0.05)], "b = {:.2f}".format(-ind_3p),
                        bbox=dict(facecolor='white', edgecolor='none', alpha=1, pad=1))
@@ -290,7 +303,7 @@ for ind, file in enumerate(Fig46_files):
             label=None)
     #--------------------------------------------------------------------
     if len(df[df['Ncyc_to_3%_strain'] > 0]) >= 3: #need at least three points to fit properly
-        [ind_ru, amp_ru, ru_x, ru_y] = power_fit(df, 'Ncyc_to_3%_strain', 'CSR', pts)
+        [ind_ru, amp_ru, ru_x, ru_y] = fit_curve(csrN_fits, file, 'Ncyc_to_3%_strain', pts)
         axs[2, 0].plot(ru_x, ru_y, color='grey', ls="--")
         axs[2, 0].text(ru_x[int(pts * 0.05)], 1.15 * ru_y[int(pts * 0.05)], "b = {:.2f}".format(-ind_ru),
                        bbox=dict(facecolor='white', edgecolor='none', alpha=1, pad=1))
@@ -333,14 +346,15 @@ plt.subplots_adjust()
 savefigname = "Fig4-6.png"
 plt.savefig(savefigname, dpi=600, bbox_inches='tight')
 plt.show()
+plt.close()
 
 #%%
 #-----------------------------------------------------------------------------------------
-# Entry 5  has three parts: Part 1 = overburdens - get them all for Ksigma 
-#                           Part 2 = alphas - only keep level ground
-#                           Part 3 = Ko - only keep 0.5
+# sigvc: left out - get all overburdens for Ksigma 
+# alpha: only keep level ground
+# Ko: only keep 0.5
 
-Fig47_files = create_file_list(all_files, [],[],[],[],[[],['0.0'],['0.5']],['csrN'])
+Fig47_files = catalog.query(tag='', alpha=0.0, Ko=0.5, output='csrN').files
 
 fig, axs = plt.subplots(nrows = 3, ncols = 1, figsize=(4,7.5), squeeze = False)
 
@@ -350,11 +364,9 @@ for ind, file in enumerate(Fig47_files):
     alpha = extra[1][1:]
     Ko    = extra[2][2:]
     
-    try:
-        df = pd.read_csv(file, header = 0)
-    except Exception as e:
-        print(f"[ERROR] Skipping {file}: {e}")
+    if file not in csrN_tables:     # could not be read (reported by load_many)
         continue
+    df = csrN_tables[file]
 
     sigvc_str = "$σ'_{vc}$ = "
     # Row based on density of file
@@ -393,59 +405,20 @@ plt.show()
 plt.close()
 #%%
 #-----------------------------------------------------------------------------------------
-forKsigma_Fig48 = create_file_list(all_files, [],[],[],[],[[],['0.0'],['0.5']],['csrN'])
+# Ksigma of the level ground cases with Ko = 0.5, at every overburden that was run (design table)
+forKsigma_Fig48 = design[(design['criterion'] == 'Ncyc_to_3%_strain') & (design['tag'] == '') &
+                         (design['alpha'] == 0.0) & (design['Ko'] == 0.5)]
 
-numFiles = len(forKsigma_Fig48)
-if numFiles != 9:
-    print("Error in creating K_sigma figure. Too many or not enough files found to represent all points.")
-    print("numFiles = {}".format(numFiles))
-    
-df_summary = np.zeros([3,12])
-CSR1atm    = np.zeros(3)
+for row in forKsigma_Fig48[forKsigma_Fig48['Ksigma'].isna()].itertuples():
+    print("{}: not enough points to determine a CSR (here or at 1 atm). Should be rerun.".format(row.basefile))
 
 fig, axs = plt.subplots(nrows = 1, ncols = 1, figsize=(4,4))
 
-for ind, file in enumerate(forKsigma_Fig48):
-    [driver, goal, water, density, extra, output] = decode_name(file)
-    sigvc   = float(extra[0][3:])
-    density = float(density)
-
-    try:
-        df  = pd.read_csv(file, header = 0)
-    except Exception as e:
-        print(f"[ERROR] Skipping {file}: {e}")
-        continue
-
-    if len(df[df['Ncyc_to_3%_strain']>0]) >= 3: # need at least three points to fit properly
-        [ind_ru, amp_ru, ru_x, ru_y] = power_fit(df,'Ncyc_to_3%_strain','CSR',10)
-        CSR_15cyc = amp_ru*15**ind_ru
-        # Enter information in df_summary array
-        df_summary[0,ind] = sigvc
-        df_summary[1,ind] = density
-        df_summary[2,ind] = CSR_15cyc
-        if sigvc == 1.0:
-            CSR1atm[dens_dict[density]] = CSR_15cyc
-   
-    else: # Not enough points to fit line.
-        print(file)
-        print("File did not have enough points to determine a CSR. Should be rerun. CSR set = 1 to allow plot to go without errors.")
-        CSR_15cyc = 1
-        df_summary[:,ind] = [extra[0][3:], density, CSR_15cyc]
-        if sigvc == 1.0:
-            CSR1atm[dens_dict[density]] = CSR_15cyc
-
-# Calculate and plot K_sigmas  
-for ind in range(numFiles):
-    sig    = df_summary[0,ind]
-    den    = df_summary[1,ind]
-    Ksigma = df_summary[2,ind] / CSR1atm[dens_dict[den]]
-    # print(Ksigma)
-    # print(den)
-    # print(sig)
-    # print(df_summary[2,ind])
-    axs.plot(sig,Ksigma, 
-            label = label_dict[den], 
-            marker =  mar_dens_dict[den], 
+# Plot K_sigmas  
+for row in forKsigma_Fig48.dropna(subset = ['Ksigma']).itertuples():
+    axs.plot(row.sigvc, row.Ksigma, 
+            label = label_dict[row.Dr], 
+            marker =  mar_dens_dict[row.Dr], 
             markersize = 6, 
             color = 'black',
             linestyle = "none")
@@ -500,7 +473,7 @@ plt.show()
 plt.close()
 #%%
 #-----------------------------------------------------------------------------------------
-Fig49_files = create_file_list(all_files, [],[],[],[],[['1'],['0.0','0.1','0.2','0.3'],['0.5']],['csrN'])
+Fig49_files = catalog.query(tag='', sigvc=1, alpha=[0.0, 0.1, 0.2, 0.3], Ko=0.5, output='csrN').files
 
 fig, axs = plt.subplots(nrows = 3, ncols = 1, figsize=(4,7.5), squeeze = False)
 
@@ -510,11 +483,9 @@ for ind, file in enumerate(Fig49_files):
     alpha = extra[1][1:]
     Ko    = extra[2][2:]
     
-    try:
-        df = pd.read_csv(file, header = 0)
-    except Exception as e:
-        print(f"[ERROR] Skipping {file}: {e}")
+    if file not in csrN_tables:     # could not be read (reported by load_many)
         continue
+    df = csrN_tables[file]
 
     # Row based on density of file, plot only portion of dataframe here cycNum > 0
     df[df["Ncyc_to_3%_strain"] > 0].plot(ax=axs[dens_dict[density],0], x = 'Ncyc_to_3%_strain', y = 'CSR',
@@ -550,44 +521,18 @@ plt.show()
 plt.close()
 #%%
 #--------------------------------------------------------------------
-forKalpha_Fig410 = create_file_list(all_files, [],[],[],[],[['1','4'],[],['0.5']],['csrN'])
+# CRR15 of the cases with Ko = 0.5 at 1 and 4 atm, at every alpha that was run (design table)
+forKalpha_Fig410 = design[(design['criterion'] == 'Ncyc_to_3%_strain') & (design['tag'] == '') &
+                          design['sigvc'].isin([1.0, 4.0]) & (design['Ko'] == 0.5)]
 
-numFiles = len(forKalpha_Fig410)
+for row in forKalpha_Fig410[forKalpha_Fig410['CRR'].isna()].itertuples():
+    print("Not enough points in file to create fit. CSR = 0 automatically. {}".format(row.basefile))
 
-if numFiles != 24:
-    print("Number of files incorrect. Check filters. {}".format(numFiles))
-    
-df_summary = pd.DataFrame(np.zeros([24,6]), columns=['dens', 'sig', 'alpha', 'csr_98','csr_1p','csr_3p'])
+df_summary = forKalpha_Fig410.rename(columns = {'Dr': 'dens', 'sigvc': 'sig', 'CRR': 'csr_3p'})
+df_summary = df_summary[['dens', 'sig', 'alpha', 'csr_3p']].fillna({'csr_3p': 0})
 
 fig, axs = plt.subplots(nrows = 1, ncols = 1, figsize=(4,4))
 
-for ind, file in enumerate(forKalpha_Fig410):
-    [driver, goal, water, density, extra, output] = decode_name(file)
-
-    try:
-        df  = pd.read_csv(file, header = 0)
-    except Exception as e:
-        print(f"[ERROR] Skipping {file}: {e}")
-        continue
-
-    sig = extra[0][3:]
-    alf = extra[1][1:]
-    
-    if len(df[df['Ncyc_to_3%_strain']>0]) >= 3: #need at least three points to fit properly
-        [ind_ru, amp_ru, ru_x, ru_y] = power_fit(df,'Ncyc_to_3%_strain','CSR',10)
-        CSR_15cyc = min(15, amp_ru*15**ind_ru)
-        
-        df_summary.loc[ind,'dens']   = int(density)
-        df_summary.loc[ind,'sig']    = int(sig)
-        df_summary.loc[ind,'alpha']  = float(alf)
-        df_summary.loc[ind,'csr_3p'] = CSR_15cyc
-    else:
-        print("Not enough points in file to create fit. CSR = 0 automatically. {}".format(file))
-        df_summary.loc[ind,'dens']   = int(density)
-        df_summary.loc[ind,'sig']    = int(sig)
-        df_summary.loc[ind,'alpha']  = float(alf)
-        df_summary.loc[ind,'csr_3p'] = 0
-        
 df_summary.sort_values(by=['alpha'], inplace = True)
 
 for d in [35,55,75]:
@@ -645,7 +590,7 @@ plt.show()
 plt.close()
 #%%
 #-----------------------------------------------------------------------------------------
-Fig411_files = create_file_list(all_files, [],[],[],[],[['1'],['0.0'],['0.3','0.5','0.8','1.2']],['csrN'])
+Fig411_files = catalog.query(tag='', sigvc=1, alpha=0.0, Ko=[0.3, 0.5, 0.8, 1.2], output='csrN').files
 
 fig, axs = plt.subplots(nrows = 3, ncols = 1, figsize=(4,7.5), squeeze = False)
 
@@ -653,11 +598,9 @@ for ind, file in enumerate(Fig411_files):
     [driver, goal, water, density, extra, output] = decode_name(file)
     Ko = extra[2][2:]
     
-    try:
-        df = pd.read_csv(file, header = 0)
-    except Exception as e:
-        print(f"[ERROR] Skipping {file}: {e}")
+    if file not in csrN_tables:     # could not be read (reported by load_many)
         continue
+    df = csrN_tables[file]
 
     df[df["Ncyc_to_3%_strain"] > 0].plot(ax=axs[dens_dict[density],0], 
                                     x = 'Ncyc_to_3%_strain', y = 'CSR', 
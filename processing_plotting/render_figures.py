@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Headless rendering of the figures of a plotting script in parallel worker processes
+- the script is split at its Spyder cell lines (#%%): the first cell (imports, catalog, csrN
+  tables, fits, design table, styling dictionaries, inputs) runs once, and every other cell,
+  which draws and saves its own figures, runs in a worker process on the Agg backend; a figure
+  cell may only use variables of the first cell (one that uses a variable set by another figure
+  cell fails with a NameError, reported with its cell)
+- with fork (Linux, macOS) every cell starts from a fresh copy of the variables of the first
+  cell; with spawn (Windows) the worker runs the first cell itself (the csv files are read
+  through the cache of load_results)
+- plt.show() does not block on Agg, and the figures of a cell are closed when it ends; the
+  600 dpi PNG files are encoded in the workers, each cell in its own temporary folder, and
+  moved to the output folder
+- the time of every cell is reported with the files it wrote, next to the wall time of the
+  whole set (about the slowest cell when there are enough cores) and the sum of the cells
+  (a serial run)
+
+Usage: python render_figures.py [plotting script] [--workers N] [--out folder]
+"""
+import matplotlib
+matplotlib.use("Agg")
+
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+import warnings
+
+import matplotlib.pyplot as plt
+
+CELL = re.compile(r"^# ?%%.*$", re.MULTILINE)
+
+_SETUP = None       # variables of the first cell, once per process
+
+#------------------------------------------------------------
+# Cells of a script as (first line, source)
+def script_cells(script):
+    with open(script, "r", encoding="utf-8") as f:
+        text = f.read()
+    cells, start, line = [], 0, 1
+    for match in CELL.finditer(text):
+        cells.append((line, text[start:match.start()]))
+        line += text[start:match.end()].count("\n")
+        start = match.end()
+    cells.append((line, text[start:]))
+    return cells
+
+# Source compiled with the line numbers of the script, for the tracebacks
+def _compile(script, line, source):
+    return compile("\n" * (line - 1) + source, script, "exec")
+
+def run_setup(script, line, source):
+    global _SETUP
+    if _SETUP is None:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+        namespace = {"__name__": "__render__", "__file__": os.path.abspath(script)}
+        exec(_compile(script, line, source), namespace)
+        _SETUP = namespace
+    return _SETUP
+
+# Runs one figure cell in a temporary folder; returns (cell, seconds, files, error)
+def render_cell(script, setup, cell, line, source, out_dir):
+    start     = time.time()
+    namespace = dict(run_setup(script, *setup))
+    work_dir  = tempfile.mkdtemp(prefix="render_", dir=out_dir)
+    previous  = os.getcwd()
+    error     = None
+    try:
+        os.chdir(work_dir)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message=".*non-interactive.*")
+            exec(_compile(script, line, source), namespace)
+    except Exception:
+        error = traceback.format_exc(limit=-3)
+    finally:
+        os.chdir(previous)
+        plt.close("all")
+    files = sorted(os.listdir(work_dir))
+    for file in files:
+        os.replace(os.path.join(work_dir, file), os.path.join(out_dir, file))
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return cell, time.time() - start, files, error
+
+#------------------------------------------------------------
+# Renders all figure cells of a script on parallel workers; returns {cell: (seconds, files, error)}
+def render_figures(script, workers=None, out_dir=None):
+    script  = os.path.abspath(script)          # before any chdir
+    out_dir = os.path.abspath(out_dir or os.getcwd())
+    os.makedirs(out_dir, exist_ok=True)
+    cells   = script_cells(script)
+    setup, figures = cells[0], cells[1:]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(figures)))
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+
+    start = time.time()
+    if context.get_start_method() == "fork":
+        previous = os.getcwd()
+        try:
+            os.chdir(out_dir)
+            run_setup(script, *setup)           # workers start from a copy of it
+        finally:
+            os.chdir(previous)
+        print("Setup cell: {:.1f} s".format(time.time() - start))
+
+    rendered = {}
+    with context.Pool(workers, maxtasksperchild=1) as pool:
+        jobs = [pool.apply_async(render_cell, (script, setup, n, line, source, out_dir))
+                for n, (line, source) in enumerate(figures, 1)]
+        for job in jobs:
+            cell, seconds, files, error = job.get()
+            rendered[cell] = (seconds, files, error)
+            label = ", ".join(files) or "no files"
+            print("  cell {} (line {}): {:6.1f} s  {}".format(cell, figures[cell - 1][0], seconds, label))
+            if error:
+                print(f"[ERROR] cell {cell}:\n{error}")
+    print("{} cells on {} workers: {:.1f} s ({:.1f} s one after another)".format(
+          len(figures), workers, time.time() - start, sum(r[0] for r in rendered.values())))
+    return rendered
+
+if __name__ == "__main__":
+    import argparse
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Render the figure cells of a plotting script in parallel")
+    parser.add_argument("script", nargs="?", default=os.path.join(script_dir, "plotting_all_undrained_cyclic_DSS.py"),
+                        help="plotting script with #%%%% cells (default: the undrained figures)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel cells (default: number of cores)")
+    parser.add_argument("--out", default=None, help="folder of the figures (default: current folder)")
+    args     = parser.parse_args()
+    rendered = render_figures(args.script, args.workers, args.out)
+    sys.exit(1 if any(r[2] for r in rendered.values()) else 0)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Created on October 2026
+
+Cycles to liquefaction triggering for any criteria, from the element histories of undrained
+cyclic DSS runs (<basefile>_1.csv ... _5.csv: Ncyc,CSR,Shear_strain_%,...,ru) instead of
+the three criteria fixed in the _summary FISH function
+- a criterion is named as the columns of the _csrN.csv files, Ncyc_to_<x>%_<measure>:
+    strain : single amplitude shear strain |Shear_strain_%| >= x (as _CSR_calcs)
+    DA     : double amplitude shear strain >= x, max - min of the strain over the last cycle
+             (rows with Ncyc in (Ncyc - 1, Ncyc])
+    ru     : excess pore pressure ratio ru >= x / 100
+  e.g. Ncyc_to_98%_ru, Ncyc_to_3%_strain, Ncyc_to_5%_DA, Ncyc_to_90%_ru
+- the first row that reaches a criterion is found for all thresholds of a measure at once
+  (sorted search on the running maximum) and Ncyc is interpolated linearly between that row
+  and the one before it, on the smoothed Ncyc of _five_files; FLAC reports the half-cycle
+  count of the step instead (_cycNum + 0.5), so values differ by up to half a cycle
+- criteria that are not reached get 0 (as 'CSR = 0' points, left out of the CSR-N fits)
+- one table per run in the layout of _csrN.csv (CSR, then one column per criterion, one row
+  per element), with the CSRs of the FLAC _csrN.csv file when there is one; tables are
+  written to results/triggering/<basefile>_csrN.csv, in the layout and names of FLAC's own.
+  The catalog of the results folder does not look into that subfolder: read them with
+  ResultsCatalog.from_folder(results/triggering) (power_fits of its csrN files) or
+  design_table(results, criteria=[...], triggering=True), giving the criteria that were written
+
+Usage: python triggering.py [results folder] [--criteria Ncyc_to_98%_ru Ncyc_to_2%_DA ...]
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from utilities import (CSRN_CRITERIA, ResultsCatalog, load_results, worker_pool)
+
+TRIGGER_FOLDER = "triggering"
+MEASURES       = ["strain", "DA", "ru"]
+
+_CRITERION = re.compile(r"^Ncyc_to_([0-9.]+)%_(" + "|".join(MEASURES) + r")$")
+
+#------------------------------------------------------------
+# (measure, threshold) of a criterion name, threshold in the units of the history column
+def parse_criterion(criterion):
+    match = _CRITERION.match(criterion)
+    if not match:
+        raise ValueError("unknown criterion '{}', use Ncyc_to_<x>%_<{}>".format(criterion, "|".join(MEASURES)))
+    value, measure = float(match.group(1)), match.group(2)
+    return measure, value / 100.0 if measure == "ru" else value
+
+# Ncyc at the first crossing of every threshold by values, interpolated between the rows around
+# it (0 where never reached)
+def crossing_cycles(Ncyc, values, thresholds):
+    thresholds = np.asarray(thresholds, dtype=float)
+    running    = np.maximum.accumulate(np.nan_to_num(values, nan=-np.inf))
+    rows       = np.searchsorted(running, thresholds, side="left")
+    cycles     = np.zeros(len(thresholds))
+    hit        = rows < len(values)
+    k          = rows[hit]
+    before     = np.maximum(k - 1, 0)
+    step       = values[k] - values[before]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(step > 0, (thresholds[hit] - values[before]) / step, 1.0)
+    cycles[hit] = Ncyc[before] + np.clip(fraction, 0.0, 1.0) * (Ncyc[k] - Ncyc[before])
+    return cycles
+
+# Double amplitude strain of every row over the cycle before it
+def double_amplitude(Ncyc, strain):
+    window = pd.Series(strain, index=pd.to_timedelta(np.maximum.accumulate(Ncyc), unit="s"))
+    rolling = window.rolling("1s")
+    return (rolling.max() - rolling.min()).to_numpy()
+
+# Cycles to every criterion of one element history (one value per criterion)
+def history_triggering(history, criteria=CSRN_CRITERIA):
+    Ncyc     = history["Ncyc"].to_numpy(dtype=float)
+    measures = {}
+    for n, criterion in enumerate(criteria):
+        measure, value = parse_criterion(criterion)
+        measures.setdefault(measure, []).append((n, value))
+    cycles = np.zeros(len(criteria))
+    for measure, items in measures.items():
+        if measure == "strain":
+            values = np.abs(history["Shear_strain_%"].to_numpy(dtype=float))
+        elif measure == "DA":
+            values = double_amplitude(Ncyc, history["Shear_strain_%"].to_numpy(dtype=float))
+        else:
+            values = history["ru"].to_numpy(dtype=float)
+        columns, thresholds = zip(*items)
+        cycles[list(columns)] = crossing_cycles(Ncyc, values, thresholds)
+    return cycles
+
+#------------------------------------------------------------
+# csrN table of a run from its element files (element n on row n), CSRs from its FLAC _csrN.csv
+# file when given, otherwise half the range of the CSR of each history
+def run_triggering(element_files, criteria=CSRN_CRITERIA, summary_file=None):
+    element_files = sorted(element_files, key=lambda f: int(f[:-4].rsplit("_", 1)[1]))
+    rows, csrs    = [], []
+    for file in element_files:
+        history = load_results(file, usecols=["Ncyc", "CSR", "Shear_strain_%", "ru"])
+        rows.append(history_triggering(history, criteria))
+        csrs.append(0.5 * (history["CSR"].max() - history["CSR"].min()))
+    if summary_file and os.path.isfile(summary_file):
+        flac = load_results(summary_file, usecols=["CSR"])["CSR"].to_numpy()
+        csrs = [flac[int(f[:-4].rsplit("_", 1)[1]) - 1] for f in element_files]
+    table = pd.DataFrame(rows, columns=list(criteria))
+    table.insert(0, "CSR", csrs)
+    return table
+
+def _run_triggering(basefile, element_files, criteria, summary_file):
+    try:
+        return basefile, run_triggering(element_files, criteria, summary_file), None
+    except Exception as e:
+        return basefile, None, e
+
+# csrN tables of all undrained runs of a catalog on parallel workers, {csrN file: table} as
+# load_many returns them (for power_fits(tables, criteria=...)); written to out_dir when write
+# - out_dir defaults to results/triggering of each run
+def triggering_tables(catalog, criteria=CSRN_CRITERIA, workers=None, out_dir=None, write=False):
+    criteria = list(criteria)
+    for criterion in criteria:
+        parse_criterion(criterion)
+    table    = catalog.query(drainage="u").table
+    elements = table[table["output"].isin([str(n) for n in range(1, 10)])]
+    summary  = table[table["output"] == "csrN"].set_index("basefile")["file"]
+    runs     = [(basefile, list(group["file"]), criteria, summary.get(basefile))
+                for basefile, group in elements.groupby("basefile", sort=True)]
+    if not runs:
+        return {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(runs)))
+    folders = elements.drop_duplicates("basefile").set_index("basefile")["file"].map(os.path.dirname)
+
+    tables = {}
+    with worker_pool(workers) as pool:
+        for basefile, csrN, error in pool.map(_run_triggering, *zip(*runs)):
+            if error is not None:
+                print(f"[ERROR] Skipping {basefile}: {error}")
+                continue
+            folder = out_dir or os.path.join(folders[basefile], TRIGGER_FOLDER)
+            file   = os.path.join(folder, basefile + "_csrN.csv")
+            if write:
+                os.makedirs(folder, exist_ok=True)
+                csrN.to_csv(file, index=False)
+            tables[file] = csrN
+    return tables
+
+if __name__ == "__main__":
+    import argparse
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Cycles to triggering criteria from undrained element histories")
+    parser.add_argument("results", nargs="?",
+                        default=os.path.join(script_dir, "..", "PM4Sand2D_Cyclic_DSS_undrained_batch", "results"),
+                        help="results folder (default: the undrained batch results)")
+    parser.add_argument("--criteria", nargs="+", default=CSRN_CRITERIA,
+                        help="criteria, Ncyc_to_<x>%%_<strain|DA|ru> (default: the three of _summary)")
+    parser.add_argument("--out", default=None, help="folder of the csrN files (default: results/triggering)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel runs (default: number of cores)")
+    args   = parser.parse_args()
+    tables = triggering_tables(ResultsCatalog.from_folder(args.results), args.criteria, args.workers,
+                               args.out, write=True)
+    print("{} csrN tables for {} criteria -> {}".format(len(tables), len(args.criteria),
+                                                       args.out or os.path.join(args.results, TRIGGER_FOLDER)))
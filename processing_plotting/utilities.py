@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
+import glob
+import hashlib
+import io
+import json
+import multiprocessing
 import numpy as np
 import os
+import pandas as pd
 import scipy.optimize as sciopt
+from   concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait)
 
 #------------------------------------------------------------
 def clean_legend(axis, location="upper left", title=None, reverse_last=False):
@@ -34,6 +41,7 @@ def power_fit(df, df_x_name, df_y_name, pts):
     amp     = 10.0**pfinal[0]
     y       = amp*x**index
     return [index, amp, x, y]  
+
 # %%
 #------------------------------------------------------------
 # decode file names used during runs for ability to retrieve loading paths, drainage, d_r, etc.
@@ -127,3 +135,458 @@ def create_file_list(fileList, driverType=[], testType=[], drainType=[],
                 file_list.append(file)
 
     return file_list
+
+
+#------------------------------------------------------------
+# Results catalog: every file name of a results folder decoded once into typed columns
+# - columns: file, basefile, driver ('DSS'), goal ('cyc', 'MRD', ...), drainage ('u' or 'd'),
+#   Dr, tag (e.g. 'r1', 's0001', 'inc2e-05' after Dr), sigvc, alpha, Ko (cyc, rec),
+#   Ncyc, maxStrain (% of MRD, vol) and output ('1' ... '5', 'csrN', 'MRD')
+# - numbers are compared as numbers, so '0.1', '0.10' and 0.1 are the same alpha
+# - files whose names are not FLAC outputs (e.g. run_log.csv) are left out
+# Example: catalog.query(Dr=35, sigvc=1, alpha=[0.0, 0.1], Ko=0.5, output='3').files
+CATALOG_COLUMNS = ["driver", "goal", "drainage", "Dr", "tag", "sigvc", "alpha", "Ko",
+                   "Ncyc", "maxStrain", "output"]
+NUMERIC_COLUMNS = ["Dr", "sigvc", "alpha", "Ko", "Ncyc", "maxStrain"]
+EXTRA_COLUMNS   = {"cyc": ["sigvc", "alpha", "Ko"], "MRD": ["Ncyc", "maxStrain"],
+                   "vol": ["Ncyc", "maxStrain"], "rec": ["sigvc", "alpha"]}
+EXTRA_PREFIXES  = {"sigvc": "sig", "alpha": "a", "Ko": "Ko", "Ncyc": "Ncyc", "maxStrain": "max"}
+
+def _number(text):
+    try:
+        return float(str(text).rstrip("%"))
+    except ValueError:
+        return np.nan
+
+# Rounded value used as index key (1, 1.0 and '1' are the same key)
+def _key(column, value):
+    return round(_number(value), 9) if column in NUMERIC_COLUMNS else str(value)
+
+# Typed columns of one file name (None when it is not a FLAC output)
+def parse_name(file):
+    infoList = os.path.basename(file)[:-4].split("_")
+    if len(infoList) < 4 or infoList[0][:1] not in ("u", "d") or not infoList[2].startswith("Dr"):
+        return None
+    [driver, goal, water, density, extra, output] = decode_name(file)
+    names = EXTRA_COLUMNS.get(goal, [])
+    if len(infoList) < 4 + len(names):
+        return None
+    row = dict.fromkeys(CATALOG_COLUMNS, np.nan)
+    row.update(file=file, basefile=os.path.basename(file)[:-len(output) - 5], driver=driver,
+               goal=goal, drainage=water, Dr=_number(density), output=output,
+               tag="_".join(infoList[3:len(infoList) - 1 - len(names)]))
+    for name, text in zip(names, extra):
+        row[name] = _number(text[len(EXTRA_PREFIXES[name]):])
+    return row
+
+class ResultsCatalog:
+    def __init__(self, files=(), table=None):
+        if table is None:
+            rows  = [row for row in map(parse_name, sorted(files)) if row]
+            table = pd.DataFrame(rows, columns=["file", "basefile"] + CATALOG_COLUMNS)
+        self.table    = table.reset_index(drop=True)
+        self._indexes = {}
+
+    @classmethod
+    def from_folder(cls, results_dir, pattern="*.csv"):
+        return cls(glob.glob(os.path.join(results_dir, pattern)))
+
+    def __len__(self):
+        return len(self.table)
+
+    # Rows as named tuples (row.file, row.Dr, row.alpha, ...)
+    def __iter__(self):
+        return self.table.itertuples(index=False)
+
+    @property
+    def files(self):
+        return list(self.table["file"])
+
+    # {key: row positions} of a column, built on its first query
+    def _index(self, column):
+        if column not in self._indexes:
+            keys = [_key(column, v) for v in self.table[column]]
+            positions = {}
+            for pos, key in enumerate(keys):
+                if key == key:                  # NaN (column not in the name) never matches
+                    positions.setdefault(key, []).append(pos)
+            self._indexes[column] = {k: np.array(v) for k, v in positions.items()}
+        return self._indexes[column]
+
+    # Subset of the catalog; one keyword per column:
+    #   value        : equality (numbers as numbers)
+    #   list or set  : any of the values ([] or None: no filter, as in create_file_list)
+    #   slice(lo, hi): lo <= value <= hi (either end can be None), numeric columns
+    def query(self, **filters):
+        keep = np.ones(len(self.table), dtype=bool)
+        for column, value in filters.items():
+            if column not in CATALOG_COLUMNS:
+                raise KeyError("unknown catalog column '{}', use one of {}".format(column, CATALOG_COLUMNS))
+            if value is None or (isinstance(value, (list, tuple, set)) and not value):
+                continue
+            if isinstance(value, slice):
+                values = self.table[column].to_numpy(dtype=float)
+                match  = ~np.isnan(values)
+                if value.start is not None:
+                    match &= values >= _number(value.start) - 1.0e-9
+                if value.stop is not None:
+                    match &= values <= _number(value.stop) + 1.0e-9
+            else:
+                index = self._index(column)
+                match = np.zeros(len(self.table), dtype=bool)
+                for v in (value if isinstance(value, (list, tuple, set)) else [value]):
+                    match[index.get(_key(column, v), [])] = True
+            keep &= match
+        return ResultsCatalog(table=self.table[keep])
+
+    # (values, sub-catalog) for every combination of the columns present in the catalog
+    def groupby(self, *columns):
+        for values, table in self.table.groupby(list(columns), sort=True):
+            yield values, ResultsCatalog(table=table)
+
+#------------------------------------------------------------
+# Cache of result csv files: every <basefile>_<n>.csv, _csrN.csv and _MRD.csv read through
+# load_results is kept as a column-major float64 .npy file, with a .json sidecar holding its
+# columns and the size, mtime and sha1 of the csv file, in a .cache folder next to the csv file
+# - later reads memory-map the .npy file, so only the columns asked for are read from disk
+# - an entry is rebuilt when the size or mtime of the csv file changed, unless its sha1 is
+#   still the same (e.g. a copied results folder), then only the sidecar is updated
+# - entries are written to temporary files and renamed, so parallel readers never see half
+#   an entry; csv files that are not all numbers are read as they are and not cached
+CACHE_FOLDER = ".cache"
+
+def cache_paths(file, cache_dir=None):
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(file)), CACHE_FOLDER)
+    name      = os.path.join(cache_dir, os.path.basename(file)[:-4])
+    return name + ".npy", name + ".json"
+
+def _signature(file):
+    stat = os.stat(file)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def _replace_file(path, write, mode="w"):
+    temp = "{}.{}.tmp".format(path, os.getpid())
+    with open(temp, mode) as f:
+        write(f)
+    os.replace(temp, path)
+
+# Sidecar of a valid cache entry of file (None when missing or out of date)
+def _cached_entry(file, cache_dir=None):
+    npy_path, json_path = cache_paths(file, cache_dir)
+    try:
+        with open(json_path, "r") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    signature = _signature(file)
+    if not os.path.isfile(npy_path) or entry.get("size") != signature["size"]:
+        return None
+    if entry.get("mtime_ns") != signature["mtime_ns"]:
+        with open(file, "rb") as f:
+            if hashlib.sha1(f.read()).hexdigest() != entry.get("sha1"):
+                return None
+        entry.update(signature)
+        _replace_file(json_path, lambda f: json.dump(entry, f))
+    return entry
+
+# Reads file and writes its cache entry; returns (sidecar or None when not cached, full table)
+def _build_entry(file, cache_dir=None):
+    signature = _signature(file)
+    with open(file, "rb") as f:
+        data = f.read()
+    df = pd.read_csv(io.BytesIO(data), header=0)
+    try:
+        values = df.to_numpy(dtype=float).T
+    except (TypeError, ValueError):
+        return None, df
+    npy_path, json_path = cache_paths(file, cache_dir)
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+    entry = dict(signature, sha1=hashlib.sha1(data).hexdigest(), columns=list(df.columns), rows=len(df))
+    _replace_file(npy_path, lambda f: np.save(f, values), "wb")
+    _replace_file(json_path, lambda f: json.dump(entry, f))
+    return entry, df
+
+def _select(df, usecols):
+    if usecols is None:
+        return df
+    missing = [c for c in usecols if c not in df.columns]
+    if missing:
+        raise ValueError("Usecols do not match columns, columns expected but not found: {}".format(missing))
+    return df[[c for c in df.columns if c in usecols]]
+
+# Table of a result csv file (all columns as float64 when cached), usecols as in pd.read_csv
+def load_results(file, usecols=None, cache=True, cache_dir=None):
+    if not cache:
+        return pd.read_csv(file, header=0, usecols=usecols)
+    entry = _cached_entry(file, cache_dir)
+    if entry is None:
+        entry, df = _build_entry(file, cache_dir)
+        return _select(df if entry is None else df.astype(float), usecols)
+    columns = entry["columns"]
+    keep    = list(_select(pd.DataFrame(columns=columns), usecols).columns)
+    values  = np.load(cache_paths(file, cache_dir)[0], mmap_mode="r" if entry["rows"] else None)
+    df      = pd.DataFrame({c: np.array(values[columns.index(c)]) for c in keep}, columns=keep)
+    del values                              # no open map, so the entry can be replaced
+    return df
+
+#------------------------------------------------------------
+# Bulk loading of the files of a catalog (or of a list of files) in parallel workers
+# - processes where they can be forked (Linux), threads otherwise: spawned processes would
+#   run the plotting scripts again, as these have no 'if __name__ == "__main__"' guard
+# - files are read with load_results (same cache); a file that cannot be read is reported
+#   as '[ERROR] Skipping <file>: <error>' and left out, as in the plotting loops
+# - files are read in chunks (about 4 per worker), at most 2 chunks per worker are in
+#   flight, and loading stops with a MemoryError once
+#   the tables read so far take more than max_memory bytes (pass usecols or a narrower query)
+# - returns {file: table} in catalog order, or with concat=True one table with the catalog
+#   columns (basefile, Dr, sigvc, alpha, ... as far as they are in the names, and not
+#   columns of the files themselves) in front
+MAX_MEMORY = 4 * 1024**3        # bytes
+
+# One task: [(file, table or None, error or None)] of a chunk of files
+def _load_chunk(files, usecols, cache, cache_dir):
+    loaded = []
+    for file in files:
+        try:
+            loaded.append((file, load_results(file, usecols, cache, cache_dir), None))
+        except Exception as e:
+            loaded.append((file, None, e))
+    return loaded
+
+def worker_pool(workers):
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+    return ThreadPoolExecutor(workers)
+
+def load_many(catalog, usecols=None, workers=None, max_memory=MAX_MEMORY, concat=False,
+              cache=True, cache_dir=None):
+    if not isinstance(catalog, ResultsCatalog):
+        catalog = ResultsCatalog(catalog)
+    files   = catalog.files
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    size    = max(1, len(files) // (4 * workers))          # files per task
+    chunks  = [files[i:i + size] for i in range(0, len(files), size)][::-1]
+
+    tables, used = {}, 0
+    with worker_pool(workers) as pool:
+        running = set()
+        while chunks or running:
+            while chunks and len(running) < 2 * workers:
+                running.add(pool.submit(_load_chunk, chunks.pop(), usecols, cache, cache_dir))
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                for file, df, error in future.result():
+                    if error is not None:
+                        print(f"[ERROR] Skipping {file}: {error}")
+                        continue
+                    tables[file] = df
+                    used += df.memory_usage(index=True).sum()
+            if max_memory and used > max_memory:
+                for future in running:
+                    future.cancel()
+                raise MemoryError("{} of {} files take {:.0f} MB, more than max_memory = {:.0f} MB; "
+                                  "pass usecols or narrow the query".format(len(tables), len(files),
+                                  used / 1024**2, max_memory / 1024**2))
+    tables = {file: tables[file] for file in files if file in tables}
+    if not concat:
+        return tables
+
+    table   = catalog.table.set_index("file")
+    columns = ["basefile"] + [c for c in CATALOG_COLUMNS if table[c].replace("", np.nan).notna().any()]
+    frames  = []
+    for file, df in tables.items():
+        keys = [c for c in columns if c not in df.columns]      # e.g. Ncyc of undrained histories
+        frames.append(df.assign(**{c: table.at[file, c] for c in keys})[keys + list(df.columns)])
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+#------------------------------------------------------------
+# Downsampling of histories for plotting (after load_results / load_many, in place of skiprows)
+# - points: rows to keep (0 or None, or more than the table has: all rows)
+# - mode  : 'stride' (every k-th row), 'minmax' (min and max of every column in equal buckets
+#           of rows, so no peak of a loop is cut) or 'lttb' (largest triangle three buckets on
+#           the columns scaled to their range, against the row number)
+# - always kept: first and last rows, reversals of every column (local extremes, e.g. the
+#   peaks of each cycle, even if there are more of them than points; wiggles smaller than
+#   tolerance x range of the column are not reversals) and, for criteria
+#   {column: [thresholds]}, the first row where |value| >= threshold and the row before it
+# Example: downsample(df, 4000, ['Shear_strain_%', 'CSR'], criteria={'Shear_strain_%': [1.0, 3.0]})
+DOWNSAMPLE_MODES = ("stride", "minmax", "lttb")
+
+# Rows where a column changes direction (the first row of a plateau at a peak); reversals whose
+# swings to both neighbouring reversals are below tolerance x range of the column are noise
+def reversals(values, tolerance=0.01):
+    steps   = np.diff(values)
+    moving  = np.flatnonzero(steps)
+    signs   = np.sign(steps[moving])
+    rows    = moving[1:][signs[1:] != signs[:-1]]
+    if rows.size == 0 or tolerance <= 0:
+        return rows
+    turns   = np.concatenate([values[:1], values[rows], values[-1:]])
+    swings  = np.abs(np.diff(turns))
+    return rows[np.maximum(swings[:-1], swings[1:]) >= tolerance * np.ptp(values)]
+
+def first_crossings(values, thresholds):
+    rows = []
+    for threshold in thresholds:
+        above = np.flatnonzero(np.abs(values) >= threshold)
+        if above.size:
+            rows += [max(above[0] - 1, 0), above[0]]
+    return np.array(rows, dtype=int)
+
+def _minmax_rows(values, points):
+    n, m    = values.shape
+    buckets = max(1, points // (2 * m))
+    size    = -(-n // buckets)
+    padded  = np.full((buckets * size, m), np.nan)
+    padded[:n] = values
+    padded  = padded.reshape(buckets, size, m)
+    offsets = (np.arange(buckets) * size)[:, None]
+    low     = np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1) + offsets
+    high    = np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1) + offsets
+    return np.concatenate([low.ravel(), high.ravel()])
+
+# LTTB: the row of each bucket with the largest triangle between the row kept in the previous
+# bucket and the mean of the next bucket (areas of all rows of a bucket at once)
+def _lttb_rows(values, points):
+    n     = len(values)
+    span  = np.ptp(values, axis=0)
+    y     = (values - values.min(axis=0)) / np.where(span > 0, span, 1.0)
+    x     = np.arange(n) / max(n - 1, 1)
+    edges = np.linspace(1, n - 1, max(points - 2, 1) + 1).astype(int)
+    rows  = [0]
+    for i in range(len(edges) - 1):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        if i + 2 < len(edges):
+            nx, ny = x[stop:edges[i + 2]].mean(), y[stop:edges[i + 2]].mean(axis=0)
+        else:
+            nx, ny = x[-1], y[-1]
+        a     = rows[-1]
+        areas = np.abs((x[a] - nx) * (y[start:stop] - y[a]) - (x[a] - x[start:stop, None]) * (ny - y[a]))
+        rows.append(start + int(np.argmax(areas.sum(axis=1))))
+    return np.array(rows + [n - 1])
+
+def downsample(df, points, columns=None, mode="minmax", criteria=None, tolerance=0.01):
+    if mode not in DOWNSAMPLE_MODES:
+        raise ValueError("unknown downsampling mode '{}', use one of {}".format(mode, DOWNSAMPLE_MODES))
+    n = len(df)
+    if not points or n <= points or n < 3:
+        return df
+    columns = list(df.columns) if columns is None else list(columns)
+    values  = df[columns].to_numpy(dtype=float)
+
+    if mode == "stride":
+        rows = np.arange(0, n, -(-n // points))
+    elif mode == "minmax":
+        rows = _minmax_rows(values, points)
+    else:
+        rows = _lttb_rows(values, points)
+    keep = [rows, [0, n - 1]] + [reversals(values[:, j], tolerance) for j in range(len(columns))]
+    for column, thresholds in (criteria or {}).items():
+        keep.append(first_crossings(df[column].to_numpy(dtype=float), thresholds))
+    rows = np.unique(np.concatenate(keep).astype(int))
+    return df.iloc[rows[rows < n]]
+
+#------------------------------------------------------------
+# CSR-N power fits CSR = amplitude * N^-b of many csrN tables at once
+# - tables: a catalog (its csrN files are read with load_many) or {file: csrN table}
+# - every (file, criterion) with at least min_points cycles > 0 is fitted as a line in log10-log10
+#   space in closed form (least squares as in power_fit), all fits at once
+# - bootstrap: pairs resampled within every fit, percentile interval of CRR at each N
+# - rounds: the points of the adaptive rounds of a case (tag r1, r2, ...) are fitted with the ones
+#   of its base run (see merge_rounds)
+# - returns a tidy table, one row per (file, criterion, N): the catalog columns of the file
+#   (Dr, sigvc, alpha, Ko, ...), points, b, amplitude, R2, N_min, N_max, CRR, CRR_low, CRR_high
+CSRN_CRITERIA = ["Ncyc_to_98%_ru", "Ncyc_to_1%_strain", "Ncyc_to_3%_strain"]
+
+def is_round(tag):
+    return len(tag) > 1 and tag[0] == "r" and tag[1:].isdigit()
+
+# {csrN file: table} with the tables of adaptive rounds appended to the one of their base run (the
+# same name without the round tag, e.g. uDSS_cyc_Dr35_r1_sig1_a0.0_Ko0.5 -> uDSS_cyc_Dr35_sig1_...),
+# which keeps its file name; rounds whose base run is not in tables stay on their own
+def merge_rounds(tables):
+    merged = dict(tables)
+    for row in ResultsCatalog(list(tables)):
+        if not is_round(str(row.tag)):
+            continue
+        name = os.path.basename(row.file).replace("_" + row.tag + "_", "_", 1)
+        base = os.path.join(os.path.dirname(row.file), name)
+        if base in merged:
+            merged[base] = pd.concat([merged[base], merged.pop(row.file)], ignore_index=True)
+    return merged
+
+# Least squares lines of the rows of x and y (last axis), points where w = 1
+def _line_fits(x, y, w):
+    n        = w.sum(axis=-1)
+    sx, sy   = (w * x).sum(axis=-1), (w * y).sum(axis=-1)
+    sxx, sxy = (w * x * x).sum(axis=-1), (w * x * y).sum(axis=-1)
+    den      = n * sxx - sx ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope     = np.where(np.abs(den) > 1.0e-12, (n * sxy - sx * sy) / den, np.nan)
+        intercept = (sy - slope * sx) / n
+        ss_res    = (w * (y - intercept[..., None] - slope[..., None] * x) ** 2).sum(axis=-1)
+        ss_tot    = (w * (y - (sy / n)[..., None]) ** 2).sum(axis=-1)
+        r2        = 1.0 - ss_res / ss_tot
+    return slope, intercept, r2
+
+def power_fits(tables, criteria=CSRN_CRITERIA, N=15, bootstrap=1000, confidence=0.95,
+               min_points=3, seed=None, y_column="CSR", rounds=True):
+    if isinstance(tables, ResultsCatalog):
+        tables = load_many(tables.query(output="csrN"))
+    if rounds:
+        tables = merge_rounds(tables)
+    Ns = np.atleast_1d(np.asarray(N, dtype=float))
+
+    # points of every fit packed to the front of the rows of x, y (log10) and w
+    keys, points = [], []
+    for file, df in tables.items():
+        for criterion in criteria:
+            if criterion in df.columns:
+                fit = df[df[criterion] > 0]
+                keys.append((file, criterion))
+                points.append((fit[criterion].to_numpy(dtype=float), fit[y_column].to_numpy(dtype=float)))
+    counts = np.array([len(p[0]) for p in points], dtype=int)
+    size   = max(counts.max() if len(counts) else 0, 1)
+    x, y   = np.ones((len(keys), size)), np.ones((len(keys), size))
+    for k, (Nk, CSRk) in enumerate(points):
+        x[k, :counts[k]], y[k, :counts[k]] = np.log10(Nk), np.log10(CSRk)
+    w      = (np.arange(size) < counts[:, None]).astype(float)
+    fitted = counts >= min_points
+    slope, intercept, r2 = _line_fits(x, y, w * fitted[:, None])
+
+    # bootstrap in chunks of fits of about 2 million resampled points
+    low, high = np.full((len(keys), len(Ns)), np.nan), np.full((len(keys), len(Ns)), np.nan)
+    if bootstrap:
+        rng   = np.random.default_rng(seed)
+        rows  = np.flatnonzero(fitted)
+        chunk = max(1, 2000000 // (bootstrap * size))
+        tails = 50.0 * (1.0 - confidence)
+        for start in range(0, len(rows), chunk):
+            r    = rows[start:start + chunk]
+            draw = (rng.random((bootstrap, len(r), size)) * counts[r][None, :, None]).astype(int)
+            xb   = np.take_along_axis(np.broadcast_to(x[r], draw.shape), draw, axis=2)
+            yb   = np.take_along_axis(np.broadcast_to(y[r], draw.shape), draw, axis=2)
+            sb, ib, _ = _line_fits(xb, yb, np.broadcast_to(w[r], draw.shape))
+            crr  = 10.0 ** (ib[..., None] + sb[..., None] * np.log10(Ns))
+            low[r], high[r] = np.nanpercentile(crr, [tails, 100.0 - tails], axis=0)
+
+    catalog = ResultsCatalog(list(tables)).table.set_index("file")
+    columns = ["basefile"] + [c for c in CATALOG_COLUMNS if catalog[c].notna().any()]
+    rows = []
+    for k, (file, criterion) in enumerate(keys):
+        for j, Nj in enumerate(Ns):
+            row = {c: catalog.at[file, c] for c in columns} if file in catalog.index else {}
+            row.update(file=file, criterion=criterion, points=counts[k], b=-slope[k],
+                       amplitude=10.0 ** intercept[k], R2=r2[k],
+                       N_min=10.0 ** x[k, :counts[k]].min() if counts[k] else np.nan,
+                       N_max=10.0 ** x[k, :counts[k]].max() if counts[k] else np.nan,
+                       N=Nj, CRR=10.0 ** (intercept[k] + slope[k] * np.log10(Nj)),
+                       CRR_low=low[k, j], CRR_high=high[k, j])
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+# [index, amp, x, y] of the fit of a file and criterion, as power_fit returns them
+def fit_curve(fits, file, criterion, pts):
+    row = fits[(fits["file"] == file) & (fits["criterion"] == criterion)].iloc[0]
+    x   = np.linspace(row["N_min"], row["N_max"], pts)
+    return [-row["b"], row["amplitude"], x, row["amplitude"] * x ** -row["b"]]